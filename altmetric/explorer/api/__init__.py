@@ -1,3 +1,11 @@
+from .adaptive import AdaptivePageSize
 from .client import Client
+from .deadline import Deadline
+from .mirror import Mirror
+from .quota import RateBudget, RateLimitedTransport, SQLiteRateBudget
+from .scheduler import BULK, INTERACTIVE, Scheduler
+from .transport import HTTP2Transport, MemoryTransport, RequestsTransport, Transport
 
-__all__ = ['Client']
+__all__ = ['AdaptivePageSize', 'BULK', 'Client', 'Deadline', 'HTTP2Transport', 'INTERACTIVE', 'MemoryTransport',
+           'Mirror', 'RateBudget', 'RateLimitedTransport', 'RequestsTransport', 'Scheduler', 'SQLiteRateBudget',
+           'Transport']
@@ -0,0 +1,101 @@
+class AdaptivePageSize:
+    '''Chooses the size of the next page to request based on how long the
+    previous page took to arrive and how many bytes each of its rows cost.
+
+    Small pages waste a round trip on a handful of rows and large pages can
+    time out or use a lot of memory when the `included` block is big, so the
+    page size is steered towards a target response time without letting a
+    single page grow beyond a byte budget.
+    '''
+
+    def __init__(self, minimum=10, maximum=1000, target_seconds=2.0,
+                 max_page_bytes=5_000_000, initial=None):
+        '''Initialise a new AdaptivePageSize
+
+        Args:
+            minimum (int, optional): smallest page size to request. Defaults to 10.
+            maximum (int, optional): largest page size to request. Should not exceed the
+                                     largest page size the API will serve. Defaults to 1000.
+            target_seconds (float, optional): desired time to fetch a page. Defaults to 2.0.
+            max_page_bytes (int, optional): largest page payload to aim for. Defaults to 5MB.
+            initial (int, optional): size of the first page when the query does not
+                                     specify a page_size. Defaults to `minimum`.
+
+        Raises:
+            ValueError: if the bounds are not positive or minimum is larger than maximum
+        '''
+        if minimum < 1 or maximum < minimum:
+            raise ValueError('page size bounds must satisfy 1 <= minimum <= maximum')
+        if target_seconds <= 0 or max_page_bytes <= 0:
+            raise ValueError('target_seconds and max_page_bytes must be positive')
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_page_bytes = max_page_bytes
+        self.initial = self.clamp(initial or minimum)
+
+    def clamp(self, size):
+        '''Restrict a page size to the configured bounds
+
+        Args:
+            size (int): a proposed page size
+
+        Returns:
+            int: the page size within [minimum, maximum]
+        '''
+        return max(self.minimum, min(self.maximum, int(size)))
+
+    def next_size(self, size, elapsed, nbytes, rows):
+        '''Work out the size of the next page from the measurements of the last one
+
+        The size at most doubles or halves between pages so that a single slow or
+        unusually large page does not swing the size too far.
+
+        Args:
+            size (int): the page size that was requested
+            elapsed (float): seconds taken to fetch the page, or None if unknown
+            nbytes (int): size of the page payload in bytes, or None if unknown
+            rows (int): number of rows in the page
+
+        Returns:
+            int: the page size to request next
+        '''
+        if not rows:
+            return self.clamp(size)
+
+        candidates = []
+        if elapsed:
+            candidates.append(self.target_seconds * rows / elapsed)
+        if nbytes:
+            candidates.append(self.max_page_bytes * rows / nbytes)
+        if not candidates:
+            return self.clamp(size)
+
+        wanted = max(size / 2, min(size * 2, min(candidates)))
+        return self.clamp(wanted)
+
+    def align(self, offset, size):
+        '''Pick a page size and page number that start a page at a given row offset
+
+        Pages are addressed by number, so a page can only start at a multiple of
+        its size.  The largest size no bigger than `size` that divides `offset` is
+        preferred; if there isn't one within the bounds, the page containing the
+        offset is requested and the rows before the offset must be skipped.
+
+        Args:
+            offset (int): zero based index of the next row wanted
+            size (int): the preferred page size
+
+        Returns:
+            tuple: (page_size, page_number, rows_to_skip)
+        '''
+        size = self.clamp(size)
+        for candidate in range(size, self.minimum - 1, -1):
+            if offset % candidate == 0:
+                return candidate, offset // candidate + 1, 0
+        return size, offset // size + 1, offset % size
+
+    def __repr__(self):
+        return (f'AdaptivePageSize(minimum={self.minimum}, maximum={self.maximum}, '
+                f'target_seconds={self.target_seconds}, max_page_bytes={self.max_page_bytes})')
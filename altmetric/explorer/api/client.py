@@ -5,10 +5,12 @@ import re
 import urllib
 import sys
 
-import requests
-
+from .deadline import as_deadline
 from .query import Query
+from .quota import RateLimitedTransport
 from .response import Response
+from .sampling import sample
+from .transport import RequestsTransport
 
 
 def digest(secret, message):
@@ -41,6 +43,7 @@ def decode_value(value):
 
 
 FILTER_REGEXP = re.compile(r'filter\[(?P<field>\w+)\]')
+FIELDS_REGEXP = re.compile(r'fields\[(?P<type>[\w-]+)\]')
 
 
 def create_api_client_query_dict(query_string):
@@ -55,6 +58,11 @@ def create_api_client_query_dict(query_string):
                 result['page_number'] = decode_value(value)
             case 'filter[order]':
                 result['order'] = decode_value(value)
+            case 'include':
+                result['include'] = value[0].split(',')
+            case str() if re.match(FIELDS_REGEXP, key):
+                fields = re.match(FIELDS_REGEXP, key).groupdict()
+                result.setdefault('fields', {})[fields['type']] = value[0].split(',')
             case str() if re.match(FILTER_REGEXP, key):
                 filters = re.match(FILTER_REGEXP, key).groupdict()
                 result[filters['field']] = decode_value(value)
@@ -64,17 +72,30 @@ def create_api_client_query_dict(query_string):
     return result
 
 
+DEFAULT_TIMEOUT = (10, 300)
+
+
 class Client:
     """Top level abstraction over the Altmetric Explorer API.
     """
 
-    def __init__(self, api_endpoint, api_key, api_secret):
+    def __init__(self, api_endpoint, api_key, api_secret, transport=None, timeout=DEFAULT_TIMEOUT,
+                 rate_budget=None, priority=0):
         """Initialises a new Client object
 
         Args:
             api_endpoint (string): the url of the explorer api (usually https://www.altmetric.com/explorer/api)
             api_key (string): your explorer api key
             api_secret (string): your explorer api secret key
+            transport (Transport, optional): the HTTP layer used to fetch every page, e.g.
+                                             HTTP2Transport or MemoryTransport. Defaults to RequestsTransport.
+            timeout (float or tuple, optional): seconds, or (connect, read) seconds, to wait for each
+                                                request. Set to None to wait forever. Defaults to (10, 300).
+            rate_budget (RateBudget, optional): a request budget shared with other clients, e.g. a
+                                                SQLiteRateBudget shared by every worker process using the
+                                                same api key. Defaults to None (no limit).
+            priority (int, optional): priority of this client's requests in the rate budget, lower
+                                      values are served first. Defaults to 0.
 
         Raises:
             ValueError: if the api key or the api secret is None
@@ -88,6 +109,10 @@ class Client:
         self.api_endpoint = api_endpoint
         self.api_key = api_key
         self.api_secret = api_secret
+        self.transport = transport or RequestsTransport()
+        if rate_budget is not None:
+            self.transport = RateLimitedTransport(self.transport, rate_budget, priority)
+        self.timeout = timeout
 
     def urlfor(self, path, **vargs):
         """
@@ -106,7 +131,7 @@ class Client:
             self.api_secret, query.filters.message()))
         return self.api_endpoint + '/' + path + '?' + str(query)
 
-    def get(self, path, **vargs):
+    def get(self, path, page_sizer=None, deadline=None, page_cache_size=8, **vargs):
         """Generic get method that constructs a call to an API path and returns a Response. An authentication digest is calculated behind the scenes using the
         api keys instance variables and the filters provided and added to the request automatically.
 
@@ -116,14 +141,80 @@ class Client:
                 page_size (int, optional): size of each page to be returned. Defaults to 100.
                 order (string, optional): the field on which the results should be sorted. Defaults to None.
                 limit (int, optional): maximum number of items to return.  Set to None to return everything. Defaults to None.
+                fields (dict, optional): sparse fieldsets, a mapping from resource type to the attribute and
+                                         relationship names to return e.g. {'research-output': ['title']}.
+                                         Defaults to None (every field).
+                include (list, optional): relationship paths whose resources should be returned in
+                                          `included` e.g. ['journal']. Defaults to None (the endpoint's default).
 
                 All other keyword arguments are treated as filters e.g. timeframe, mention_sources_countries
+            page_sizer (AdaptivePageSize, optional): adjust the page size between pages using the measured
+                response time and bytes per row. If page_size is not given the first page uses the sizer's
+                initial size. Defaults to None (follow the API's links.next with a fixed page size).
+            deadline (float or Deadline, optional): time budget in seconds for fetching every page of the
+                response. When it runs out iteration stops and `Response.cursor` records where. Defaults to None.
+            page_cache_size (int, optional): number of recently used pages the response keeps for indexing
+                and slicing e.g. `response[250000]`. Defaults to 8.
 
         Returns:
             response: A Response object for the API call.
+
+        Raises:
+            TimeoutError: if the deadline has passed or the first page is not returned in time
         """
+        deadline = as_deadline(deadline)
+        if deadline is not None and deadline.expired:
+            raise TimeoutError('the deadline has already passed')
+        if page_sizer is not None and 'page_size' not in vargs:
+            vargs['page_size'] = page_sizer.initial
         url = self.urlfor(path, **vargs)
-        return Response(requests.get(url))
+        timeout = self.timeout if deadline is None else deadline.clamp(self.timeout)
+        return Response(self.transport.get(url, timeout=timeout), client=self, path=path, params=vargs,
+                        page_sizer=page_sizer, deadline=deadline, page_cache_size=page_cache_size)
+
+    def sample(self, path, pages, strata=1, seed=None, confidence=0.95, **vargs):
+        '''Fetch a random sample of the pages of a query, for estimates that need a
+        fraction of the requests of a full walk
+
+        The first page is fetched to find `total-pages`, then the sampled pages are
+        fetched by page number.
+
+        Args:
+            path (string): The path to query on the API endpoint.
+            pages (int or float): the number of pages to sample, or the fraction of pages if less than 1
+            strata (int, optional): the number of contiguous bands of pages to sample from separately.
+                                    Combine with `order` to stratify on the sort field. Defaults to 1.
+            seed (int, optional): seed for the random choice of pages, for repeatable samples. Defaults to None.
+            confidence (float, optional): the confidence level of estimates. Defaults to 0.95.
+            vargs: page_size, order and filters, as for `get`
+
+        Returns:
+            Sample: the sampled rows with their weights, and estimators
+
+        Raises:
+            ValueError: if pages is not positive, or the query or the fetch of a sampled page failed
+        '''
+        return sample(self.get(path, **vargs), pages, strata=strata, seed=seed, confidence=confidence)
+
+    def resume(self, cursor, **args):
+        '''Carry on fetching a response from where a walk over it stopped
+
+        Args:
+            cursor (Cursor): the `cursor` of a Response that ran out of time
+            args: any other arguments accepted by `get`, e.g. deadline or page_sizer. The page
+                  size, page number and filters of the cursor replace any given here.
+
+        Returns:
+            response: A Response object starting at the cursor
+
+        Raises:
+            ValueError: if the cursor does not know the api path it came from
+        '''
+        if cursor.path is None:
+            raise ValueError('the cursor does not record the path that was queried')
+        response = self.get(cursor.path, **{**args, **cursor.params})
+        response.skip = cursor.skip
+        return response
 
     def recode_url(self, url):
         '''Rebuilds a url using the attributes of the client to rewrite the hostname,
@@ -0,0 +1,19 @@
+import pytest
+
+from .client import Client
+from .transport import MemoryTransport
+
+
+@pytest.fixture
+def rows():
+    '''The rows served at research_outputs/mentions by `api_client`. Override it in a
+    test module to serve a different result.'''
+    return [{'id': n, 'type': 'mention'} for n in range(50)]
+
+
+@pytest.fixture
+def api_client(rows):
+    '''A client whose MemoryTransport serves `rows` at research_outputs/mentions, 10 to a page'''
+    client = Client('https://www.altmetric.com/explorer/api', 'key', 'secret', transport=MemoryTransport())
+    client.transport.add_results(client, 'research_outputs/mentions', rows, 10)
+    return client
@@ -0,0 +1,72 @@
+import time
+
+
+class Deadline:
+    '''A time budget shared by every request made while walking a response'''
+
+    def __init__(self, seconds):
+        '''Initialise a Deadline that expires a number of seconds from now
+
+        Args:
+            seconds (float): the time budget
+
+        Raises:
+            ValueError: if seconds is negative
+        '''
+        if seconds < 0:
+            raise ValueError('a deadline cannot be in the past')
+
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @property
+    def remaining(self):
+        '''Get the time left before the deadline
+
+        Returns:
+            float: seconds remaining, never less than 0
+        '''
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        '''Check if the deadline has passed
+
+        Returns:
+            bool: True if there is no time left
+        '''
+        return self.remaining <= 0
+
+    def clamp(self, timeout):
+        '''Shorten a request timeout so that the request cannot outlive the deadline
+
+        Args:
+            timeout (float, tuple or None): a timeout in the form accepted by `requests`,
+                                            either seconds or (connect, read) seconds
+
+        Returns:
+            float or tuple: the timeout, no longer than the time remaining
+        '''
+        remaining = self.remaining
+        if timeout is None:
+            return remaining
+        if type(timeout) is tuple:
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def __repr__(self):
+        return f'Deadline({self.seconds}, remaining={self.remaining:.3f})'
+
+
+def as_deadline(deadline):
+    '''Convert a number of seconds to a Deadline
+
+    Args:
+        deadline (float, Deadline or None): a time budget
+
+    Returns:
+        Deadline: the deadline, or None if there isn't one
+    '''
+    if deadline is None or type(deadline) is Deadline:
+        return deadline
+    return Deadline(deadline)
@@ -0,0 +1,94 @@
+from .resources import identifier, linkage
+
+
+class Fields:
+    '''Holds sparse fieldsets, the attributes and relationships to return for each
+    type of resource, and provides methods that turn them into query parameters
+    and apply them to resources returned by the api.'''
+
+    def __init__(self):
+        """Initializes a new Fields object"""
+        self.items = {}
+
+    def add_fields(self, resource_type, names):
+        """Add fields to the fieldset of a resource type
+
+        Args:
+            resource_type (string): JSON:API type of the resource e.g. research-output
+            names (string, list, tuple or set): attribute and relationship name(s)
+
+        Returns:
+            Fields: self
+        """
+        if type(names) is str:
+            names = names.split(',')
+        fieldset = self.items.setdefault(resource_type, [])
+        fieldset.extend(name for name in names if name not in fieldset)
+        return self
+
+    def __len__(self):
+        """Count of fieldsets
+
+        Returns:
+            integer: number of resource types with a fieldset
+        """
+        return len(self.items)
+
+    def project(self, resource):
+        """Remove the attributes and relationships that are not in the fieldset of
+        the resource's type.  This is a fallback for endpoints that ignore the
+        fields parameter.
+
+        Args:
+            resource (dict): a JSON:API resource object
+
+        Returns:
+            dict: the resource itself if there is nothing to remove, else a projected copy
+        """
+        fieldset = self.items.get(resource.get('type'))
+        if fieldset is None:
+            return resource
+
+        result = resource
+        for member in ('attributes', 'relationships'):
+            values = resource.get(member)
+            if values and not values.keys() <= set(fieldset):
+                if result is resource:
+                    result = dict(resource)
+                result[member] = {name: value for name, value in values.items() if name in fieldset}
+        return result
+
+    def __str__(self):
+        """Create a string representation of the Fields in the form of query
+        parameters.
+
+        Returns:
+            string: api query parameters
+        """
+        return '&'.join(f'fields[{resource_type}]={",".join(names)}'
+                        for resource_type, names in self.items.items())
+
+
+def select_included(data, included, include):
+    '''Keep only the included resources reached by following the include paths
+    from the primary data.  This is a fallback for endpoints that ignore the
+    include parameter.
+
+    Args:
+        data (list): the primary resources of a page
+        included (list): the included resources of the page
+        include (list): relationship paths e.g. ['journal', 'research-outputs.journal']
+
+    Returns:
+        list: the included resources that were asked for, in their original order
+    '''
+    index = {identifier(resource): resource for resource in included}
+    selected = set()
+    for path in include:
+        resources = data
+        for name in path.split('.'):
+            keys = [identifier(item) for resource in resources
+                    for item in linkage(resource.get('relationships', {}).get(name))]
+            selected.update(keys)
+            resources = [index[key] for key in keys if key in index]
+    return [resource for resource in included if identifier(resource) in selected]
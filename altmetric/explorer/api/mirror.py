@@ -0,0 +1,273 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+from .resources import identifier, linkage
+from .sqlite import Transaction
+
+DEFAULT_INDEXES = {
+    'research-output': ['altmetric-score', 'publication-date', 'output-type'],
+    'mention': ['post-type'],
+}
+
+
+class Mirror:
+    '''A local SQLite copy of resources fetched from the api, so that repeated
+    questions about data already pulled can be answered without re-fetching it.
+
+    Resources are keyed by their JSON:API (type, id) and stored as JSON.  Their
+    relationships are stored in a join table so that related resources can be
+    looked up in either direction.  Storing a resource that has not changed since
+    it was last stored does not touch its row, so refreshing a mirror only writes
+    what changed.
+    '''
+
+    def __init__(self, path, indexes=DEFAULT_INDEXES):
+        '''Initialise a Mirror, creating the database if it does not exist
+
+        Args:
+            path (string): the SQLite database file, or ':memory:'
+            indexes (dict, optional): attributes to index for each resource type.
+                                      Defaults to the commonly filtered attributes in DEFAULT_INDEXES.
+        '''
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+
+        with Transaction(self.connection) as db:
+            db.execute('CREATE TABLE IF NOT EXISTS resources ('
+                       'type TEXT NOT NULL, id TEXT NOT NULL, resource TEXT NOT NULL, '
+                       'hash TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (type, id))')
+            db.execute('CREATE TABLE IF NOT EXISTS relationships ('
+                       'type TEXT NOT NULL, id TEXT NOT NULL, name TEXT NOT NULL, '
+                       'related_type TEXT NOT NULL, related_id TEXT NOT NULL, '
+                       'PRIMARY KEY (type, id, name, related_type, related_id))')
+            db.execute('CREATE INDEX IF NOT EXISTS relationships_related '
+                       'ON relationships (related_type, related_id)')
+
+        for resource_type, attributes in indexes.items():
+            for attribute in attributes:
+                self.index(resource_type, attribute)
+
+    def index(self, resource_type, attribute):
+        '''Index an attribute of a resource type so that queries filtering on it are fast
+
+        The index is on the expression `json_extract(resource, '$.attributes."<attribute>"')`,
+        so queries must use the same expression (as `find` does) to benefit from it.
+
+        Args:
+            resource_type (string): JSON:API type of the resource e.g. research-output
+            attribute (string): the attribute name e.g. altmetric-score
+
+        Returns:
+            Mirror: self
+        '''
+        name = re.sub(r'\W', '_', f'resources_{resource_type}_{attribute}')
+        with Transaction(self.connection) as db:
+            db.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON resources ({attribute_expression(attribute)}) '
+                       f'WHERE type = {quote(resource_type)}')
+        return self
+
+    def store(self, response, batch_size=500):
+        '''Stream every page of a response, data and included, into the mirror
+
+        Each batch of resources is upserted in a single transaction.  If the response
+        was fetched with sparse fieldsets, the fields it returned are merged into the
+        resources already in the mirror rather than replacing them.
+
+        Args:
+            response (Response): the response to store
+            batch_size (int, optional): resources written per transaction. Defaults to 500.
+
+        Returns:
+            dict: the number of resources that were inserted, updated and unchanged
+        '''
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        batch = []
+        merge = bool(response.fields)
+        for page, skip in response.pages():
+            batch.extend(response.project(page.data[skip:]))
+            batch.extend(response.included_in(page))
+            while len(batch) >= batch_size:
+                self.__write(batch[:batch_size], counts, merge)
+                batch = batch[batch_size:]
+        if batch:
+            self.__write(batch, counts, merge)
+        return counts
+
+    def upsert(self, resources, merge=False):
+        '''Store resources in the mirror in a single transaction
+
+        Args:
+            resources (list): JSON:API resource objects
+            merge (bool, optional): merge the attributes and relationships of the resources into
+                                    those already in the mirror, for resources fetched with sparse
+                                    fieldsets. Defaults to False (replace them).
+
+        Returns:
+            dict: the number of resources that were inserted, updated and unchanged
+        '''
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.__write(resources, counts, merge)
+        return counts
+
+    def __write(self, resources, counts, merge=False):
+        latest = {identifier(resource): resource for resource in resources}
+
+        with Transaction(self.connection) as db:
+            existing = {}
+            keys = list(latest)
+            columns = 'type, id, hash, resource' if merge else 'type, id, hash'
+            for start in range(0, len(keys), 400):
+                chunk = keys[start:start + 400]
+                rows = db.execute(f'SELECT {columns} FROM resources WHERE (type, id) IN (VALUES '
+                                  + ', '.join('(?, ?)' for _ in chunk) + ')',
+                                  [part for key in chunk for part in key])
+                existing.update(((row['type'], row['id']), row) for row in rows)
+
+            changed = []
+            for key, resource in latest.items():
+                if merge and key in existing:
+                    resource = merge_resource(json.loads(existing[key]['resource']), resource)
+                content = json.dumps(resource, sort_keys=True)
+                digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                if key not in existing or existing[key]['hash'] != digest:
+                    changed.append((key, (resource, content, digest)))
+
+            now = time.time()
+            db.executemany('INSERT INTO resources (type, id, resource, hash, updated_at) VALUES (?, ?, ?, ?, ?) '
+                           'ON CONFLICT (type, id) DO UPDATE SET resource = excluded.resource, '
+                           'hash = excluded.hash, updated_at = excluded.updated_at',
+                           [(*key, content, digest, now) for key, (_, content, digest) in changed])
+            db.executemany('DELETE FROM relationships WHERE type = ? AND id = ?',
+                           [key for key, _ in changed])
+            db.executemany('INSERT OR IGNORE INTO relationships (type, id, name, related_type, related_id) '
+                           'VALUES (?, ?, ?, ?, ?)',
+                           [(*key, name, *identifier(item))
+                            for key, (resource, _, _) in changed
+                            for name, relationship in resource.get('relationships', {}).items()
+                            for item in linkage(relationship)])
+
+        inserted = sum(1 for key, _ in changed if key not in existing)
+        counts['inserted'] += inserted
+        counts['updated'] += len(changed) - inserted
+        counts['unchanged'] += len(latest) - len(changed)
+
+    def get(self, resource_type, resource_id):
+        '''Get a resource by its type and id
+
+        Args:
+            resource_type (string): JSON:API type of the resource
+            resource_id (string or int): id of the resource
+
+        Returns:
+            dict: the resource, or None if it is not in the mirror
+        '''
+        row = self.connection.execute('SELECT resource FROM resources WHERE type = ? AND id = ?',
+                                      (resource_type, str(resource_id))).fetchone()
+        return json.loads(row['resource']) if row else None
+
+    def find(self, resource_type, attributes=None):
+        '''Find the resources of a type whose attributes have the given values
+
+        Args:
+            resource_type (string): JSON:API type of the resource
+            attributes (dict, optional): attribute names and the values they must equal. Defaults to None.
+
+        Returns:
+            list: the matching resources
+        '''
+        # the type is inlined rather than bound so that SQLite can use the partial indexes
+        conditions = [f'type = {quote(resource_type)}']
+        params = []
+        for attribute, value in (attributes or {}).items():
+            conditions.append(f'{attribute_expression(attribute)} = ?')
+            params.append(value)
+        rows = self.connection.execute('SELECT resource FROM resources WHERE ' + ' AND '.join(conditions), params)
+        return [json.loads(row['resource']) for row in rows]
+
+    def related(self, resource_type, resource_id, name):
+        '''Get the resources that a resource's relationship refers to
+
+        Args:
+            resource_type (string): JSON:API type of the resource
+            resource_id (string or int): id of the resource
+            name (string): the name of the relationship e.g. journal
+
+        Returns:
+            list: the related resources that are in the mirror
+        '''
+        rows = self.connection.execute(
+            'SELECT resources.resource FROM relationships JOIN resources '
+            'ON resources.type = relationships.related_type AND resources.id = relationships.related_id '
+            'WHERE relationships.type = ? AND relationships.id = ? AND relationships.name = ?',
+            (resource_type, str(resource_id), name))
+        return [json.loads(row['resource']) for row in rows]
+
+    def query(self, sql, params=()):
+        '''Run a read query against the mirror
+
+        Args:
+            sql (string): the SQL, using the resources and relationships tables
+            params (tuple or dict, optional): parameters for the SQL
+
+        Returns:
+            list: the rows as dictionaries
+        '''
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def close(self):
+        '''Close the database connection'''
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f'Mirror({repr(self.path)})'
+
+
+def merge_resource(stored, sparse):
+    '''Merge a resource fetched with sparse fieldsets into the stored copy of it
+
+    Args:
+        stored (dict): the resource as it is in the mirror
+        sparse (dict): the resource with only some of its attributes and relationships
+
+    Returns:
+        dict: the stored resource with the fields of the sparse one replacing its own
+    '''
+    merged = {**stored, **sparse}
+    for member in ('attributes', 'relationships'):
+        if member in stored or member in sparse:
+            merged[member] = {**stored.get(member, {}), **sparse.get(member, {})}
+    return merged
+
+
+def attribute_expression(attribute):
+    '''Build the SQL expression that extracts an attribute from a stored resource
+
+    Args:
+        attribute (string): the attribute name
+
+    Returns:
+        string: a json_extract expression
+    '''
+    return f"json_extract(resource, {quote('$.attributes.' + json.dumps(attribute))})"
+
+
+def quote(value):
+    '''Quote a string as a SQL literal
+
+    Args:
+        value (string): the string
+
+    Returns:
+        string: the SQL literal
+    '''
+    return "'" + value.replace("'", "''") + "'"
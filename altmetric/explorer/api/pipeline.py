@@ -0,0 +1,141 @@
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count, islice
+
+
+def decode_page(content, transform=None, fields=None):
+    '''Decode the body of a page and transform each of its rows
+
+    This runs in a worker process so `transform` must be picklable, i.e. a
+    function defined at the top level of a module rather than a lambda.
+
+    Args:
+        content (bytes): the raw body of the page
+        transform (callable, optional): called with each row, its return value replaces the row
+        fields (Fields, optional): sparse fieldsets applied to each row before the transform
+
+    Returns:
+        list: the (transformed) rows from the page's data field
+    '''
+    return decode_page_and_link(content, transform, fields)[0]
+
+
+def decode_page_and_link(content, transform=None, fields=None):
+    '''Decode the body of a page as `decode_page` does, and find the url of the next page
+
+    Args:
+        content (bytes): the raw body of the page
+        transform (callable, optional): called with each row, its return value replaces the row
+        fields (Fields, optional): sparse fieldsets applied to each row before the transform
+
+    Returns:
+        tuple: (rows, next_url) where next_url is the value of links.next, or None on the last page
+    '''
+    body = json.loads(content)
+    rows = body.get('data', [])
+    if fields:
+        rows = [fields.project(row) for row in rows]
+    return decode_rows(rows, transform), body.get('links', {}).get('next')
+
+
+def pipeline(response, transform=None, fetchers=4, processes=None, max_in_flight=8):
+    '''Fetch the remaining pages of a response in parallel and decode them in a process pool
+
+    Threads download the raw bytes of each page and hand them to a pool of processes
+    that decode the JSON and apply `transform` to each row, so decoding and per-row
+    work is spread across cores rather than competing for the GIL.  Rows are yielded
+    in the same order as `Response.data` and no more than `max_in_flight` pages are
+    held in memory at a time.
+
+    Pages are requested by number up to `total-pages`, or until a page has no
+    links.next if the api does not report it.  Outstanding fetches are cancelled as
+    soon as the consumer stops iterating.  If the response has a deadline and it runs
+    out, iteration stops and `response.cursor` is set to the first page whose rows
+    were not yielded.
+
+    Args:
+        response (Response): a response created by `Client.get`
+        transform (callable, optional): a picklable function applied to each row
+        fetchers (int, optional): number of threads fetching pages. Defaults to 4.
+        processes (int, optional): number of decoding processes. Defaults to the number of CPUs.
+        max_in_flight (int, optional): maximum pages fetched or decoded ahead of the consumer. Defaults to 8.
+
+    Yields:
+        object: each (transformed) row of each page in order
+
+    Raises:
+        ValueError: if max_in_flight is less than 1, the response cannot sign page urls
+                    or the fetch of a page failed
+    '''
+    if max_in_flight < 1:
+        raise ValueError('max_in_flight must be at least 1')
+    response.cursor = None
+    if response.failed:
+        return
+
+    first_page = response.first_page
+    yield from decode_rows(response.project(first_page.data[response.skip:]), transform)
+    if not first_page.next_url or not first_page.data:
+        return
+
+    page_size = first_page.size or response.page_size
+    first_number = response.params.get('page_number', 1)
+    if 'total-pages' in response.meta:
+        numbers = iter(range(first_number + 1, response.meta['total-pages'] + 1))
+    else:
+        numbers = count(first_number + 1)
+    deadline = response.deadline
+
+    threads = ThreadPoolExecutor(fetchers)
+    pool = ProcessPoolExecutor(processes)
+
+    def fetch(number):
+        # hand the page straight on to the pool rather than waiting for it to be decoded,
+        # so every page in flight can be decoded at once
+        if deadline is not None and deadline.expired:
+            raise TimeoutError('the deadline has passed')
+        raw_response = response.transport.get(response.page_url(number, page_size),
+                                              timeout=response.request_timeout)
+        if raw_response.status_code >= 300:
+            raise ValueError(f'fetching page {number} failed with status {raw_response.status_code}')
+        return pool.submit(decode_page_and_link, raw_response.content, transform, response.fields)
+
+    def submit(pages):
+        return ((number, threads.submit(fetch, number)) for number in islice(numbers, pages))
+
+    try:
+        pending = deque(submit(max_in_flight))
+        while pending:
+            number, future = pending.popleft()
+            try:
+                decoded = future.result(timeout=deadline and deadline.remaining)
+                rows, next_url = decoded.result(timeout=deadline and deadline.remaining)
+            except TimeoutError:
+                if deadline is None or not deadline.expired:
+                    raise
+                response.cursor = response.cursor_at((number - 1) * page_size, page_size)
+                return
+            if not next_url or not rows:
+                yield from rows
+                return
+            pending.extend(submit(1))
+            yield from rows
+    finally:
+        threads.shutdown(wait=False, cancel_futures=True)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def decode_rows(rows, transform=None):
+    '''Apply a transform to a list of rows
+
+    Args:
+        rows (list): rows of data
+        transform (callable, optional): called with each row, its return value replaces the row
+
+    Returns:
+        list: the transformed rows, or `rows` itself if there is no transform
+    '''
+    if transform is None:
+        return rows
+    return [transform(row) for row in rows]
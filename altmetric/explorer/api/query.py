@@ -1,4 +1,5 @@
-from .filters import Filters
+from .fields import Fields
+from .filters import Filters, isvector
 
 
 class Query:
@@ -9,6 +10,7 @@ class Query:
         '''Initialise a Query with an initial set of params'''
         self.items = []
         self.filters = Filters()
+        self.fields = Fields()
         self.add_params(**kvargs)
 
     def add_params(self, **kvargs):
@@ -27,6 +29,13 @@ class Query:
                     self.items.append(f'filter[order]={value}')
                 case ('key' | 'digest'):
                     self.items.append(f'{arg}={value}')
+                case 'fields':
+                    for resource_type, names in value.items():
+                        self.fields.add_fields(resource_type, names)
+                case 'include':
+                    if isvector(value):
+                        value = ','.join(value)
+                    self.items.append(f'include={value}')
                 case _:
                     self.filters.add_filter(arg, value)
         return self
@@ -72,4 +81,7 @@ class Query:
         if self.filters:
             result.append(str(self.filters))
 
+        if self.fields:
+            result.append(str(self.fields))
+
         return '&'.join(result)
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .sqlite import Transaction
+from .transport import Transport
+
+
+class RateBudget:
+    '''Base class for a request budget shared by many clients.
+
+    A budget hands out one token per request.  Waiting requests are served in
+    order of priority (lower values first) and then in the order they arrived,
+    so every process sharing the budget gets its turn.
+    '''
+
+    def acquire(self, priority=0, timeout=None):
+        '''Block until a request may be made
+
+        Args:
+            priority (int, optional): lower values are served first. Defaults to 0.
+            timeout (float, optional): the longest time to wait. Defaults to None (wait forever).
+
+        Raises:
+            TimeoutError: if no token was available in time
+        '''
+        raise NotImplementedError
+
+
+class SQLiteRateBudget(RateBudget):
+    '''A token bucket kept in a SQLite database so that it is shared by every
+    process on a machine that opens the same file, without any outside service.
+
+    Processes that share a budget must agree on its `rate`, `per` and `burst`.
+    SQLite locking is not reliable on network file systems, so to share a budget
+    between machines implement `RateBudget.acquire` against a shared service.
+    '''
+
+    def __init__(self, path, rate, per=1.0, burst=None, stale_after=10.0, poll_interval=0.05):
+        '''Initialise a SQLiteRateBudget
+
+        Args:
+            path (string): the SQLite database file, created if it does not exist
+            rate (float): the number of requests allowed every `per` seconds by every process together
+            per (float, optional): the period of the rate in seconds. Defaults to 1.0.
+            burst (float, optional): the most tokens that can be saved up, at least 1.
+                                     Defaults to `rate`, or 1 if `rate` is less than 1.
+            stale_after (float, optional): seconds after which a waiter that stopped polling, e.g.
+                                           because its process died, loses its place. Waiters poll at
+                                           least four times in this period. Defaults to 10.0.
+            poll_interval (float, optional): the shortest time between checks for a token. Defaults to 0.05.
+
+        Raises:
+            ValueError: if rate or per are not positive, or burst is less than 1
+        '''
+        if rate <= 0 or per <= 0:
+            raise ValueError('rate and per must be positive')
+        if burst is None:
+            burst = max(1, rate)
+        if burst < 1:
+            raise ValueError('burst must be at least 1, or no request could ever be made')
+
+        self.path = path
+        self.rate = rate / per
+        self.burst = burst
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.local = threading.local()
+
+        with self.transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS bucket ('
+                       'id INTEGER PRIMARY KEY CHECK (id = 1), tokens REAL NOT NULL, updated REAL NOT NULL)')
+            db.execute('CREATE TABLE IF NOT EXISTS waiters ('
+                       'ticket INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, seen REAL NOT NULL)')
+            db.execute('INSERT OR IGNORE INTO bucket (id, tokens, updated) VALUES (1, ?, ?)',
+                       (self.burst, time.time()))
+
+    def acquire(self, priority=0, timeout=None):
+        started = time.monotonic()
+        with self.transaction() as db:
+            ticket = db.execute('INSERT INTO waiters (priority, seen) VALUES (?, ?)',
+                                (priority, time.time())).lastrowid
+
+        try:
+            while True:
+                wait = self.__try_acquire(ticket, priority)
+                if wait is None:
+                    return
+
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise TimeoutError('timed out waiting for the rate budget')
+                    wait = min(wait, remaining)
+                time.sleep(wait)
+        finally:
+            with self.transaction() as db:
+                db.execute('DELETE FROM waiters WHERE ticket = ?', (ticket,))
+
+    def __try_acquire(self, ticket, priority):
+        with self.transaction() as db:
+            now = time.time()
+            db.execute('UPDATE waiters SET seen = ? WHERE ticket = ?', (now, ticket))
+            db.execute('DELETE FROM waiters WHERE seen < ?', (now - self.stale_after,))
+
+            tokens, updated = db.execute('SELECT tokens, updated FROM bucket WHERE id = 1').fetchone()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            ahead = db.execute('SELECT COUNT(*) FROM waiters WHERE priority < ? OR (priority = ? AND ticket < ?)',
+                               (priority, priority, ticket)).fetchone()[0]
+
+            if ahead == 0 and tokens >= 1:
+                tokens -= 1
+                db.execute('DELETE FROM waiters WHERE ticket = ?', (ticket,))
+                wait = None
+            else:
+                # poll well within stale_after, or other waiters would take this one for dead
+                wait = min(max(self.poll_interval, (ahead + 1 - tokens) / self.rate), self.stale_after / 4)
+
+            db.execute('UPDATE bucket SET tokens = ?, updated = ? WHERE id = 1', (tokens, now))
+            return wait
+
+    def transaction(self):
+        '''Open an exclusive transaction on the budget's database
+
+        Returns:
+            Transaction: a context manager that yields the connection and commits on exit
+        '''
+        # connections cannot be shared between threads, or with a forked child process
+        if getattr(self.local, 'pid', None) != os.getpid():
+            self.local.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.local.pid = os.getpid()
+        return Transaction(self.local.connection)
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != 'local'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, local=threading.local())
+
+    def __repr__(self):
+        return f'SQLiteRateBudget({repr(self.path)}, rate={self.rate}/s, burst={self.burst})'
+
+
+class RateLimitedTransport(Transport):
+    '''Wraps a transport so that every request first takes a token from a RateBudget'''
+
+    def __init__(self, transport, budget, priority=0):
+        '''Initialise a RateLimitedTransport
+
+        Args:
+            transport (Transport): the transport that makes the requests
+            budget (RateBudget): the budget shared with other clients
+            priority (int, optional): priority of this transport's requests, lower values
+                                      are served first. Defaults to 0.
+        '''
+        self.transport = transport
+        self.budget = budget
+        self.priority = priority
+
+    def get(self, url, timeout=None):
+        '''Wait for a token and then fetch a url
+
+        The read part of `timeout` also limits the time spent waiting for a token,
+        so a deadline covers time spent queueing as well as time on the network.
+        '''
+        self.budget.acquire(self.priority, timeout=timeout[1] if type(timeout) is tuple else timeout)
+        return self.transport.get(url, timeout=timeout)
+
+    def close(self):
+        self.transport.close()
+
+    def __repr__(self):
+        return f'RateLimitedTransport({self.transport}, {self.budget}, priority={self.priority})'
@@ -0,0 +1,33 @@
+def identifier(resource):
+    '''Get the identity of a JSON:API resource object
+
+    Args:
+        resource (dict): a resource object or resource identifier
+
+    Returns:
+        tuple: (type, id) with the id as a string
+    '''
+    return (resource.get('type'), str(resource.get('id')))
+
+
+def linkage(relationship):
+    '''Get the resource identifiers that a relationship refers to
+
+    The api is not consistent in how it nests relationships: `data` rows wrap
+    identifiers in `{'data': ...}` while `included` rows use bare identifiers,
+    and to-many relationships may be a list of either.
+
+    Args:
+        relationship (dict or list): the value of one key of a resource's relationships
+
+    Returns:
+        list: the resource identifiers (dicts with type and id)
+    '''
+    if type(relationship) is dict and 'data' in relationship:
+        relationship = relationship['data']
+
+    if relationship is None:
+        return []
+    if type(relationship) is list:
+        return [item for value in relationship for item in linkage(value)]
+    return [relationship]
@@ -1,20 +1,55 @@
-import requests
+import time
+from collections import OrderedDict
+
+from .fields import Fields, select_included
+from .pipeline import pipeline
+from .transport import RequestsTransport
+
+
+def load_page(url, transport=None, timeout=None):
+    '''Fetch a page from the api, timing how long it takes to arrive
+
+    Args:
+        url (string): the url of the page
+        transport (Transport, optional): used to fetch the page. Defaults to RequestsTransport.
+        timeout (float or tuple, optional): seconds, or (connect, read) seconds, to wait for the api
+
+    Returns:
+        Page: the page of data
+
+    Raises:
+        TimeoutError: if the api does not respond in time
+    '''
+    transport = transport or RequestsTransport()
+    started = time.monotonic()
+    raw_response = transport.get(url, timeout=timeout)
+    return Page(raw_response, elapsed=time.monotonic() - started, transport=transport, timeout=timeout)
 
 
 class Page:
     '''Encapsulates a page returned from the api and provides accessor methods
     '''
 
-    def __init__(self, raw_response):
+    def __init__(self, raw_response, elapsed=None, transport=None, timeout=None):
         '''Initialize a page
 
         Args:
             raw_response (requests.Response): the raw response returned by `requests`
+            elapsed (float, optional): seconds taken to fetch the page. Defaults to the
+                                       `elapsed` time recorded by `requests`, if any.
+            transport (Transport, optional): used to fetch the next page. Defaults to RequestsTransport.
+            timeout (float or tuple, optional): seconds, or (connect, read) seconds, to wait for the
+                                                next page. Defaults to None (wait forever).
         '''
         self.__raw_response = raw_response
+        self.__transport = transport
+        self.__timeout = timeout
         self.__json = raw_response.json()
+        if elapsed is None and hasattr(raw_response, 'elapsed'):
+            elapsed = raw_response.elapsed.total_seconds()
+        self.elapsed = elapsed
 
-    def next_page(self):
+    def next_page(self, timeout=None):
         '''Get the next page if there is one
 
         The next page is found by looking for the links.next key in an API response.
@@ -23,12 +58,28 @@ class Page:
 
         If the key is not found then this method will return None.
 
+        Args:
+            timeout (float or tuple, optional): seconds, or (connect, read) seconds, to wait for the
+                                                api. Defaults to the timeout this page was fetched with.
+
         Returns:
             Page: the next page, or None if this is the last page
+
+        Raises:
+            TimeoutError: if the api does not respond in time
         '''
-        url = self.__json.get('links', {}).get('next', None)
+        url = self.next_url
         if url:
-            return Page(requests.get(url))
+            return load_page(url, self.__transport, self.__timeout if timeout is None else timeout)
+
+    @property
+    def next_url(self):
+        '''Get the URL of the next page
+
+        Returns:
+            str: the value of links.next, or None if this is the last page
+        '''
+        return self.__json.get('links', {}).get('next', None)
 
     def __repr__(self):
         return f'Page({self.__raw_response})'
@@ -42,6 +93,15 @@ class Page:
         '''
         return self.__raw_response.status_code
 
+    @property
+    def nbytes(self):
+        '''Get the size of the page payload
+
+        Returns:
+            int: number of bytes in the body of the response
+        '''
+        return len(self.__raw_response.content)
+
     @property
     def data(self):
         '''Get the data from the page as a list of Python dictionaries
@@ -69,22 +129,80 @@ class Page:
         '''
         return self.__json.get('meta', {})
 
+    @property
+    def size(self):
+        '''Get the page size that the api used to serve the page
+
+        Returns:
+            int: the value of meta.query.page.size, or None if it is not present
+        '''
+        return self.meta.get('query', {}).get('page', {}).get('size', None)
+
+
+class Cursor:
+    '''Marks where a walk over a response stopped so that it can be resumed'''
+
+    def __init__(self, url, path, params, offset, skip=0):
+        '''Initialise a Cursor
+
+        Args:
+            url (string): the signed url of the page holding the next row
+            path (string): the api path that was queried, or None if it is not known
+            params (dict): the query parameters of that page, including page_size and page_number
+            offset (int): number of rows of the whole result that come before the cursor
+            skip (int, optional): number of rows at the start of the page that come before the cursor. Defaults to 0.
+        '''
+        self.url = url
+        self.path = path
+        self.params = params
+        self.offset = offset
+        self.skip = skip
+
+    def __repr__(self):
+        return f'Cursor({repr(self.url)}, offset={self.offset}, skip={self.skip})'
+
 
 class Response:
     '''Encapsulates the response from an api query'''
 
-    def __init__(self, raw_response):
+    def __init__(self, raw_response, client=None, path=None, params=None, page_sizer=None, deadline=None,
+                 page_cache_size=8):
         '''Initialize a Response
 
         Args:
             raw_response (requests.response): a response from a call to the api using the `requests` HTTP library
+            client (Client, optional): the client that made the request, used to sign urls for other pages
+            path (string, optional): the api path that was queried
+            params (dict, optional): the query parameters that were used
+            page_sizer (AdaptivePageSize, optional): adjusts the page size between pages. Requires `client` and `path`.
+            deadline (Deadline, optional): time budget for walking all of the pages of the response
+            page_cache_size (int, optional): pages kept for indexing and slicing. Defaults to 8.
         '''
+        if page_sizer is not None and (client is None or path is None):
+            raise ValueError('page_sizer requires the client and path of the query')
+
         self.raw_response = raw_response
+        self.client = client
+        self.path = path
+        self.params = dict(params or {})
+        self.fields = Fields()
+        for resource_type, names in self.params.get('fields', {}).items():
+            self.fields.add_fields(resource_type, names)
+        include = self.params.get('include')
+        self.include = include.split(',') if type(include) is str else include
+        self.page_sizer = page_sizer
+        self.deadline = deadline
+        self.cursor = None
+        self.skip = 0
+        self.transport = client.transport if client is not None else RequestsTransport()
+        self.timeout = client.timeout if client is not None else None
         self.text = raw_response.text
         if raw_response.status_code < 300:
-            self.first_page = Page(raw_response)
+            self.first_page = Page(raw_response, transport=self.transport, timeout=self.timeout)
         else:
             self.first_page = None
+        self.page_cache_size = page_cache_size
+        self.page_cache = OrderedDict()
 
     @property
     def status_code(self):
@@ -121,13 +239,8 @@ class Response:
         Yields:
             dict: a row of data until all rows of all pages have been exhausted
         '''
-        if self.failed:
-            return
-
-        page = self.first_page
-        while page:
-            yield from page.data
-            page = page.next_page()
+        for page, skip in self.pages():
+            yield from self.project(page.data[skip:])
 
     @property
     def included(self):
@@ -136,10 +249,286 @@ class Response:
         Yields:
             dict: a row of data until all rows of all pages have been exhausted
         '''
-        page = self.first_page
+        for page, _ in self.pages():
+            yield from self.included_in(page)
+
+    def included_in(self, page):
+        '''Get the included objects of a page, with the response's include and fields applied
+
+        Args:
+            page (Page): a page of the response
+
+        Returns:
+            list: the included resources
+        '''
+        included = page.included
+        if self.include is not None:
+            included = select_included(page.data, included, self.include)
+        return self.project(included)
+
+    def project(self, resources):
+        '''Apply the response's sparse fieldsets to resources, in case the endpoint ignored them
+
+        Args:
+            resources (list): JSON:API resource objects
+
+        Returns:
+            list: the resources with only the requested attributes and relationships
+        '''
+        if not self.fields:
+            return resources
+        return [self.fields.project(resource) for resource in resources]
+
+    def pipeline(self, transform=None, fetchers=4, processes=None, max_in_flight=8):
+        '''Returns a lazy sequence of rows fetched in parallel and decoded in a process pool
+
+        A faster alternative to `data` for large exports where decoding and per-row
+        work are CPU bound.  Pages are requested by number, so the response must have
+        been created by `Client.get`.
+
+        Args:
+            transform (callable, optional): a picklable function applied to each row in a worker process
+            fetchers (int, optional): number of threads fetching pages. Defaults to 4.
+            processes (int, optional): number of decoding processes. Defaults to the number of CPUs.
+            max_in_flight (int, optional): maximum pages held ahead of the consumer. Defaults to 8.
+
+        Yields:
+            object: a (transformed) row of data, in the same order as `data`
+        '''
+        return pipeline(self, transform, fetchers=fetchers, processes=processes, max_in_flight=max_in_flight)
+
+    def pages(self):
+        '''Returns a lazy sequence of the pages of the response
+
+        Pages are followed through links.next unless a `page_sizer` was given, in
+        which case each page after the first is requested by number with a page
+        size chosen from the measurements of the page before it.  If the api serves
+        smaller pages than were asked for, the sizer's maximum is lowered to the size
+        it served and the page is fetched again at that size.
+
+        If the response has a deadline and it runs out, the sequence stops early and
+        `cursor` is set to a Cursor for the first page that was not fetched.  Pass it
+        to `Client.resume` to carry on from where the walk stopped.
+
+        Yields:
+            tuple: (Page, rows_to_skip) where `rows_to_skip` is the number of rows at
+                   the start of the page that were already returned by an earlier page
+        '''
+        self.cursor = None
+        if self.failed:
+            return
+
+        sizer = self.page_sizer
+        size = self.page_size
+        number = self.params.get('page_number', 1)
+        page, skip = self.first_page, self.skip
+        offset = (number - 1) * size + skip
+
         while page:
-            yield from page.included
-            page = page.next_page()
+            if sizer is not None and page.size is not None and page.size < size:
+                # the api served smaller pages than were asked for, so never ask it for more
+                sizer.maximum = page.size
+                sizer.minimum = min(sizer.minimum, page.size)
+                if number > 1 or skip:
+                    # the page does not start where it was expected to, so fetch the one holding offset
+                    size, number, skip = sizer.align(offset, page.size)
+                    page = self.__load(self.page_url(number, size), offset, size)
+                    continue
+                size = page.size
+
+            yield page, skip
+            offset += len(page.data) - skip
+            if sizer is None:
+                url, skip, size = page.next_url, 0, page.size or size
+            elif page.data:
+                size = sizer.next_size(size, page.elapsed, page.nbytes, len(page.data))
+                size, number, skip = sizer.align(offset, size)
+                url = page.next_url and self.page_url(number, size)
+            else:
+                url = None
+
+            page = url and self.__load(url, offset, size)
+
+    def __load(self, url, offset, size):
+        if self.deadline is None or not self.deadline.expired:
+            try:
+                return load_page(url, self.transport, self.request_timeout)
+            except TimeoutError:
+                if self.deadline is None or not self.deadline.expired:
+                    raise
+        self.cursor = self.cursor_at(offset, size, url)
+
+    def cursor_at(self, offset, page_size, url=None):
+        '''Create a Cursor for the row at an offset
+
+        The cursor points at the page of `page_size` rows holding the row, and
+        records how many rows at the start of that page to skip.
+
+        Args:
+            offset (int): number of rows of the whole result before the cursor
+            page_size (int): the page size to resume with
+            url (string, optional): the url of the page, used when the response cannot sign urls
+
+        Returns:
+            Cursor: the cursor
+        '''
+        page_number, skip = divmod(offset, page_size)
+        page_number += 1
+        if self.client is not None and self.path is not None:
+            url = self.page_url(page_number, page_size)
+        return Cursor(url, self.path, self.page_params(page_number, page_size), offset, skip)
+
+    @property
+    def request_timeout(self):
+        '''Get the timeout for the next request, shortened to fit inside the deadline
+
+        Returns:
+            float or tuple: seconds, or (connect, read) seconds, or None to wait forever
+        '''
+        if self.deadline is None:
+            return self.timeout
+        return self.deadline.clamp(self.timeout)
+
+    @property
+    def page_size(self):
+        '''Get the page size of the first page
+
+        The api may serve smaller pages than were asked for, so the size it reports
+        is preferred to the size that was requested.
+
+        Returns:
+            int: the size the api reports it used, or failing that the page size
+                 requested, or failing that the number of rows in the first page
+        '''
+        if self.first_page is not None and self.first_page.size:
+            return self.first_page.size
+        if 'page_size' in self.params:
+            return int(self.params['page_size'])
+        if self.first_page is None:
+            return None
+        return len(self.first_page.data)
+
+    def page_url(self, page_number, page_size):
+        '''Construct a signed URL for a page of this response
+
+        Args:
+            page_number (int): the 1 based number of the page
+            page_size (int): the size of the pages
+
+        Returns:
+            str: the URL
+
+        Raises:
+            ValueError: if the response was not created with a client and path
+        '''
+        if self.client is None or self.path is None:
+            raise ValueError('the response was not created with a client and path')
+
+        return self.client.urlfor(self.path, **self.page_params(page_number, page_size))
+
+    def page_params(self, page_number, page_size):
+        '''Get the query parameters for a page of this response
+
+        Args:
+            page_number (int): the 1 based number of the page
+            page_size (int): the size of the pages
+
+        Returns:
+            dict: the response's parameters with the page size and number replaced
+        '''
+        params = {arg: value for arg, value in self.params.items()
+                  if arg not in ('page_size', 'page_number')}
+        return {'page_size': page_size, 'page_number': page_number, **params}
+
+    def __len__(self):
+        '''Count the rows in the response
+
+        Returns:
+            int: total-results from the meta block, no more than fit in total-pages, less any
+                 rows before the first row of the response, or 0 if the request failed
+
+        Raises:
+            TypeError: if the api did not report the total number of results
+        '''
+        if self.failed:
+            return 0
+        if 'total-results' not in self.meta:
+            raise TypeError('the api did not report total-results so the length is not known')
+
+        results = self.meta['total-results']
+        if 'total-pages' in self.meta:
+            # aggregate endpoints report the size of the population they summarise,
+            # not the number of rows they return
+            if self.meta['total-pages'] <= self.params.get('page_number', 1):
+                return max(0, len(self.first_page.data) - self.skip)
+            results = min(results, self.meta['total-pages'] * self.page_size)
+        return max(0, results - self.__first_offset())
+
+    def __bool__(self):
+        '''A response is always truthy, even when it has no rows. Use `ok` or `failed` to check for errors.'''
+        return True
+
+    def __getitem__(self, key):
+        '''Get a row, or a list of rows, by position without walking the pages before it
+
+        Only the pages holding the rows are fetched, by page number, and the most
+        recently used pages are kept so nearby rows do not need another request.
+
+        Args:
+            key (int or slice): the position of the row(s), counting from the first row of the response
+
+        Returns:
+            dict or list: a row for an int, a list of rows for a slice
+
+        Raises:
+            IndexError: if the position is out of range
+            TypeError: if the key is not an int or a slice
+            ValueError: if the page holding the row could not be fetched
+        '''
+        if type(key) is slice:
+            return [self[index] for index in range(len(self))[key]]
+        if type(key) is not int:
+            raise TypeError(f'response indices must be integers or slices, not {type(key).__name__}')
+
+        length = len(self)
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
+            raise IndexError('response index out of range')
+
+        offset = self.__first_offset() + key
+        page = self.page(offset // self.page_size + 1)
+        if page.status_code >= 300:
+            raise ValueError(f'fetching the page of row {key} failed with status {page.status_code}')
+        return self.project([page.data[offset % self.page_size]])[0]
+
+    def page(self, page_number):
+        '''Get a page of the response by number, using the page size of the first page
+
+        Args:
+            page_number (int): the 1 based number of the page
+
+        Returns:
+            Page: the page
+
+        Raises:
+            ValueError: if the page is not the first one and the response was not created with a client and path
+        '''
+        if page_number == self.params.get('page_number', 1):
+            return self.first_page
+
+        if page_number in self.page_cache:
+            self.page_cache.move_to_end(page_number)
+            return self.page_cache[page_number]
+
+        page = load_page(self.page_url(page_number, self.page_size), self.transport, self.request_timeout)
+        self.page_cache[page_number] = page
+        while len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+        return page
+
+    def __first_offset(self):
+        return (self.params.get('page_number', 1) - 1) * self.page_size + self.skip
 
     @property
     def meta(self):
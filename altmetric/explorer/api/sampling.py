@@ -0,0 +1,290 @@
+import math
+import random
+from statistics import NormalDist
+
+from .response import load_page
+
+
+class Estimate:
+    '''An estimated population value with a confidence interval'''
+
+    def __init__(self, value, variance, confidence=0.95):
+        '''Initialise an Estimate
+
+        Args:
+            value (float): the point estimate
+            variance (float): the estimated variance of the point estimate
+            confidence (float, optional): the confidence level of the interval. Defaults to 0.95.
+        '''
+        self.value = value
+        self.variance = variance
+        self.confidence = confidence
+
+    @property
+    def stderr(self):
+        '''Get the standard error of the estimate
+
+        Returns:
+            float: the square root of the variance
+        '''
+        return math.sqrt(self.variance)
+
+    @property
+    def interval(self):
+        '''Get the confidence interval, using a normal approximation
+
+        Returns:
+            tuple: (low, high)
+        '''
+        margin = NormalDist().inv_cdf((1 + self.confidence) / 2) * self.stderr
+        return (self.value - margin, self.value + margin)
+
+    def __repr__(self):
+        low, high = self.interval
+        return f'Estimate({self.value:.6g}, {self.confidence:.0%} CI [{low:.6g}, {high:.6g}])'
+
+
+class Stratum:
+    '''A contiguous band of pages and the pages sampled from it'''
+
+    def __init__(self, index, page_numbers):
+        '''Initialise a Stratum
+
+        Args:
+            index (int): the position of the stratum, from 0
+            page_numbers (range): every page number in the stratum
+        '''
+        self.index = index
+        self.page_numbers = page_numbers
+        self.pages = {}
+
+    @property
+    def weight(self):
+        '''Get the sampling weight of each row sampled from this stratum
+
+        Returns:
+            float: the number of pages in the stratum per page sampled, or 0 if no pages were sampled
+        '''
+        if not self.pages:
+            return 0.0
+        return len(self.page_numbers) / len(self.pages)
+
+    def __repr__(self):
+        return f'Stratum({self.index}, {self.page_numbers}, sampled={sorted(self.pages)})'
+
+
+class Sample:
+    '''A stratified random sample of the pages of a response.
+
+    Pages are clusters of rows, so the estimators treat each sampled page as one
+    observation: the estimate of a total in a stratum is the mean page total times
+    the number of pages in the stratum, with the usual finite population correction.
+    '''
+
+    def __init__(self, total_pages, total_results, strata, confidence=0.95):
+        '''Initialise a Sample
+
+        Args:
+            total_pages (int): the number of pages in the full response
+            total_results (int): the number of rows in the full response, or None if not known
+            strata (list): the Stratum objects with their sampled pages
+            confidence (float, optional): the confidence level of estimates. Defaults to 0.95.
+        '''
+        self.total_pages = total_pages
+        self.total_results = total_results
+        self.strata = strata
+        self.confidence = confidence
+
+    @property
+    def data(self):
+        '''Returns the sampled rows, tagged with their sampling weights
+
+        Each row is a shallow copy of the original with `sampling-weight` and
+        `sampling-stratum` added to its `meta` object.
+
+        Yields:
+            dict: a row of sampled data
+        '''
+        for stratum in self.strata:
+            weight = stratum.weight
+            for number in sorted(stratum.pages):
+                for row in stratum.pages[number]:
+                    meta = {**row.get('meta', {}), 'sampling-weight': weight, 'sampling-stratum': stratum.index}
+                    yield {**row, 'meta': meta}
+
+    def estimate_total(self, value):
+        '''Estimate the total of a value over every row of the full response
+
+        Args:
+            value (callable): called with each row, returns a number
+
+        Returns:
+            Estimate: the estimated total
+        '''
+        total, variance = 0.0, 0.0
+        for stratum in self.strata:
+            page_totals = [sum(value(row) for row in rows) for rows in stratum.pages.values()]
+            total_h, variance_h = stratum_total(len(stratum.page_numbers), page_totals)
+            total += total_h
+            variance += variance_h
+        return Estimate(total, variance, self.confidence)
+
+    def estimate_count(self, predicate=None):
+        '''Estimate how many rows of the full response match a predicate
+
+        Args:
+            predicate (callable, optional): called with each row, returns True if it should be counted.
+                                            Defaults to None (count every row).
+
+        Returns:
+            Estimate: the estimated count
+        '''
+        if predicate is None:
+            return self.estimate_total(lambda row: 1)
+        return self.estimate_total(lambda row: 1 if predicate(row) else 0)
+
+    def estimate_proportion(self, predicate):
+        '''Estimate the proportion of the rows of the full response that match a predicate
+
+        Uses a ratio estimator with a linearised variance.
+
+        Args:
+            predicate (callable): called with each row, returns True if it matches
+
+        Returns:
+            Estimate: the estimated proportion, between 0 and 1
+        '''
+        matches = self.estimate_count(predicate).value
+        rows = self.estimate_count().value
+        if not rows:
+            return Estimate(0.0, 0.0, self.confidence)
+
+        ratio = matches / rows
+        variance = 0.0
+        for stratum in self.strata:
+            residuals = [sum((1 if predicate(row) else 0) - ratio for row in rows)
+                         for rows in stratum.pages.values()]
+            variance += stratum_total(len(stratum.page_numbers), residuals)[1]
+        return Estimate(ratio, variance / rows ** 2, self.confidence)
+
+    def estimate_counts(self, key):
+        '''Estimate the distribution of the rows of the full response over the values of a key
+
+        Args:
+            key (callable): called with each row, returns the value to group it by
+
+        Returns:
+            dict: an Estimate of the count for each value seen in the sample
+        '''
+        values = {key(row) for rows in self.__sampled_pages() for row in rows}
+        return {value: self.estimate_count(lambda row, value=value: key(row) == value) for value in values}
+
+    @property
+    def requests(self):
+        '''Get the number of pages fetched to draw the sample
+
+        Returns:
+            int: pages sampled
+        '''
+        return sum(len(stratum.pages) for stratum in self.strata)
+
+    def __sampled_pages(self):
+        for stratum in self.strata:
+            yield from stratum.pages.values()
+
+    def __repr__(self):
+        return f'Sample({self.requests} of {self.total_pages} pages, {len(self.strata)} strata)'
+
+
+def stratum_total(population, page_totals):
+    '''Estimate the total of a stratum and its variance from a simple random sample of pages
+
+    Args:
+        population (int): number of pages in the stratum
+        page_totals (list): the total of each sampled page
+
+    Returns:
+        tuple: (estimated total, estimated variance)
+    '''
+    count = len(page_totals)
+    mean = sum(page_totals) / count
+    if count < 2:
+        return population * mean, 0.0
+
+    spread = sum((total - mean) ** 2 for total in page_totals) / (count - 1)
+    correction = 1 - count / population
+    return population * mean, population ** 2 * correction * spread / count
+
+
+def allocate(total_pages, pages, strata):
+    '''Split the pages into contiguous strata and decide how many to sample from each
+
+    Pages are allocated in proportion to the size of each stratum, with at least two
+    pages from each stratum (so its variance can be estimated) where it has them.
+
+    Args:
+        total_pages (int): number of pages in the response
+        pages (int): number of pages to sample
+        strata (int): number of strata
+
+    Returns:
+        list: (page_numbers, sample_size) for each non-empty stratum, empty if there are no pages
+    '''
+    if total_pages < 1:
+        return []
+    strata = max(1, min(strata, total_pages))
+    bounds = [1 + total_pages * index // strata for index in range(strata + 1)]
+    result = []
+    for low, high in zip(bounds, bounds[1:]):
+        page_numbers = range(low, high)
+        share = round(pages * len(page_numbers) / total_pages)
+        result.append((page_numbers, min(len(page_numbers), max(2, share))))
+    return result
+
+
+def sample(response, pages, strata=1, seed=None, confidence=0.95):
+    '''Draw a stratified random sample of the pages of a response
+
+    Args:
+        response (Response): the first page of the query, from `Client.get`
+        pages (int or float): the number of pages to sample, or the fraction of pages if less than 1
+        strata (int, optional): the number of contiguous bands of pages to sample from separately.
+                                When the results are ordered this stratifies on the order. Defaults to 1.
+        seed (int, optional): seed for the random choice of pages, for repeatable samples. Defaults to None.
+        confidence (float, optional): the confidence level of estimates. Defaults to 0.95.
+
+    Returns:
+        Sample: the sampled pages, with no strata if the query has no results
+
+    Raises:
+        ValueError: if pages is not positive, or the query or the fetch of a sampled page failed
+    '''
+    if pages <= 0:
+        raise ValueError('pages must be positive')
+    if response.failed:
+        raise ValueError(f'the query failed with status {response.status_code}')
+
+    total_pages = response.meta.get('total-pages', 1)
+    if total_pages < 1:
+        return Sample(0, response.meta.get('total-results'), [], confidence)
+    if pages < 1:
+        pages = math.ceil(pages * total_pages)
+
+    page_size = response.page_size
+    first_number = response.params.get('page_number', 1)
+    generator = random.Random(seed)
+    result = []
+
+    for index, (page_numbers, size) in enumerate(allocate(total_pages, pages, strata)):
+        stratum = Stratum(index, page_numbers)
+        for number in sorted(generator.sample(page_numbers, size)):
+            if number == first_number:
+                page = response.first_page
+            else:
+                page = load_page(response.page_url(number, page_size), response.transport, response.request_timeout)
+            if page.status_code >= 300:
+                raise ValueError(f'fetching page {number} failed with status {page.status_code}')
+            stratum.pages[number] = response.project(page.data)
+        result.append(stratum)
+
+    return Sample(total_pages, response.meta.get('total-results'), result, confidence)
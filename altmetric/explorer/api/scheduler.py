@@ -0,0 +1,335 @@
+import heapq
+import itertools
+import math
+import queue
+import threading
+
+from .deadline import as_deadline
+from .response import Response, load_page
+
+INTERACTIVE = 0
+BULK = 10
+
+DONE = object()
+
+
+class Job:
+    '''A query submitted to a Scheduler, fetched one page at a time.
+
+    The rows of a job can be consumed while it is still running.  A job whose
+    consumer falls behind stops being scheduled once `max_buffered_pages` pages
+    are waiting, so it does not hold more than that in memory.
+    '''
+
+    def __init__(self, scheduler, path, params, priority, deadline):
+        '''Initialise a Job. Jobs are created by `Scheduler.submit`.
+
+        Args:
+            scheduler (Scheduler): the scheduler running the job
+            path (string): the api path to query
+            params (dict): query parameters, as for `Client.get`
+            priority (int): lower values are fetched first
+            deadline (Deadline): the time by which the job must finish, or None
+        '''
+        self.scheduler = scheduler
+        self.path = path
+        self.params = params
+        self.priority = priority
+        self.deadline = deadline
+        self.state = 'pending'
+        self.error = None
+        self.response = None
+        self.cursor = None
+        self.pages_fetched = 0
+        self.rows_fetched = 0
+        self.next_url = None
+        self.parked = False
+        self.buffer = queue.Queue()
+        self.finished = threading.Event()
+
+    @property
+    def total_pages(self):
+        '''Get the number of pages in the result
+
+        Returns:
+            int: total-pages from the first page, or None if it has not been fetched
+        '''
+        if self.response is None or self.response.failed:
+            return None
+        return self.response.meta.get('total-pages')
+
+    @property
+    def progress(self):
+        '''Get the fraction of the job that has been fetched
+
+        Returns:
+            float: between 0 and 1, or None if the size of the result is not known yet
+        '''
+        if self.done:
+            return 1.0 if self.state == 'complete' else self.pages_fetched / (self.total_pages or 1)
+        if not self.total_pages:
+            return None
+        return min(1.0, self.pages_fetched / self.total_pages)
+
+    @property
+    def done(self):
+        '''Check if the job has stopped, whether it completed or not
+
+        Returns:
+            bool: True if the state is complete, failed, expired or cancelled
+        '''
+        return self.finished.is_set()
+
+    def cancel(self):
+        '''Stop fetching pages for the job. Rows already fetched can still be consumed.'''
+        self.finish('cancelled')
+
+    def wait(self, timeout=None):
+        '''Block until the job has stopped
+
+        Args:
+            timeout (float, optional): the longest time to wait. Defaults to None (wait forever).
+
+        Returns:
+            bool: True if the job has stopped
+        '''
+        return self.finished.wait(timeout)
+
+    def pages(self):
+        '''Returns the pages of the job as they are fetched
+
+        Yields:
+            Page: each page in order
+
+        Raises:
+            Exception: whatever stopped the job, if it failed with an exception
+        '''
+        while True:
+            page = self.buffer.get()
+            if page is DONE:
+                self.buffer.put(DONE)
+                if self.error is not None:
+                    raise self.error
+                return
+            self.scheduler.wake(self)
+            yield page
+
+    @property
+    def data(self):
+        '''Returns a lazy sequence of rows from the pages of the job as they are fetched
+
+        Yields:
+            dict: a row of data
+        '''
+        for page in self.pages():
+            yield from self.response.project(page.data)
+
+    def finish(self, state, error=None):
+        '''Mark the job as stopped. Only the first call has any effect.
+
+        Args:
+            state (string): complete, failed, expired or cancelled
+            error (Exception, optional): raised to the consumer of the job's pages
+        '''
+        with self.scheduler.condition:
+            if self.done:
+                return
+            self.state = state
+            self.error = error
+            self.finished.set()
+            self.scheduler.jobs.discard(self)
+            self.scheduler.condition.notify_all()
+        self.buffer.put(DONE)
+
+    def __repr__(self):
+        return f'Job({repr(self.path)}, priority={self.priority}, state={self.state}, pages={self.pages_fetched})'
+
+
+class Scheduler:
+    '''Runs many queries over one bounded pool of worker threads.
+
+    Every page fetch is a separate task, so pages from different jobs are
+    interleaved: between any two pages of a bulk export, a waiting job with a
+    lower priority value (e.g. an interactive lookup) goes first.  Jobs with the
+    same priority are served earliest deadline first and then in turn.
+
+    Leaving a `with Scheduler(...)` block cancels the jobs that have not finished.
+    '''
+
+    def __init__(self, client, workers=4, max_buffered_pages=4):
+        '''Initialise a Scheduler and start its workers
+
+        Args:
+            client (Client): the client used to sign and fetch every page
+            workers (int, optional): the number of pages fetched at once. Defaults to 4.
+            max_buffered_pages (int, optional): pages fetched ahead of each job's consumer. Defaults to 4.
+        '''
+        self.client = client
+        self.max_buffered_pages = max_buffered_pages
+        self.condition = threading.Condition()
+        self.ready = []
+        self.jobs = set()
+        self.sequence = itertools.count()
+        self.closed = False
+        self.threads = [threading.Thread(target=self.__work, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, path, priority=BULK, deadline=None, **params):
+        '''Queue a query
+
+        Args:
+            path (string): the api path to query
+            priority (int, optional): lower values are fetched first, e.g. INTERACTIVE or BULK. Defaults to BULK.
+            deadline (float or Deadline, optional): seconds in which the job must finish. When it runs out
+                                                    the job stops and its `cursor` records where. Defaults to None.
+            params: page_size, order and filters, as for `Client.get`
+
+        Returns:
+            Job: the queued job
+
+        Raises:
+            ValueError: if the scheduler has been shut down
+        '''
+        job = Job(self, path, params, priority, as_deadline(deadline))
+        with self.condition:
+            if self.closed:
+                raise ValueError('the scheduler has been shut down')
+            self.jobs.add(job)
+            self.__push(job)
+        return job
+
+    def wake(self, job):
+        '''Re-queue a job that stopped because its consumer fell behind. Called by the
+        job when one of its pages is consumed.
+
+        Args:
+            job (Job): the job
+        '''
+        with self.condition:
+            if job.parked and job.buffer.qsize() < self.max_buffered_pages:
+                job.parked = False
+                self.__push(job)
+
+    def shutdown(self, wait=True, cancel=False):
+        '''Stop accepting jobs and stop the workers once every job has finished
+
+        A job whose consumer has fallen behind only finishes once its consumer
+        catches up or its deadline passes, so unless `cancel` is True this waits
+        for the consumers too.
+
+        Args:
+            wait (bool, optional): block until the workers have stopped. Defaults to True.
+            cancel (bool, optional): cancel the jobs that have not finished. Defaults to False.
+        '''
+        with self.condition:
+            self.closed = True
+            jobs = list(self.jobs)
+            self.condition.notify_all()
+
+        if cancel:
+            for job in jobs:
+                job.cancel()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(cancel=True)
+
+    def __push(self, job):
+        expires_at = job.deadline.expires_at if job.deadline is not None else math.inf
+        heapq.heappush(self.ready, (job.priority, expires_at, next(self.sequence), job))
+        self.condition.notify()
+
+    def __next_job(self):
+        with self.condition:
+            while True:
+                self.__expire_parked()
+                while self.ready:
+                    job = heapq.heappop(self.ready)[-1]
+                    if not job.done:
+                        job.state = 'running'
+                        return job
+                if self.closed and not self.jobs:
+                    return None
+                self.condition.wait(self.__until_next_deadline())
+
+    def __expire_parked(self):
+        # parked jobs are not in the queue, so their deadlines are checked here instead
+        for job in [job for job in self.jobs if job.parked and job.deadline is not None and job.deadline.expired]:
+            self.__expire(job)
+
+    def __until_next_deadline(self):
+        deadlines = [job.deadline.remaining for job in self.jobs if job.parked and job.deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def __work(self):
+        while (job := self.__next_job()) is not None:
+            try:
+                more = self.__fetch(job)
+            except Exception as error:
+                job.finish('failed', error)
+                continue
+
+            if not more:
+                job.finish('complete')
+                continue
+
+            with self.condition:
+                if job.buffer.qsize() >= self.max_buffered_pages:
+                    job.parked = True
+                else:
+                    self.__push(job)
+
+    def __fetch(self, job):
+        '''Fetch the next page of a job
+
+        Returns:
+            bool: True if the job has more pages to fetch
+        '''
+        if job.deadline is not None and job.deadline.expired:
+            return self.__expire(job)
+
+        timeout = self.client.timeout if job.deadline is None else job.deadline.clamp(self.client.timeout)
+        try:
+            if job.response is None:
+                raw_response = self.client.transport.get(self.client.urlfor(job.path, **job.params), timeout=timeout)
+                job.response = Response(raw_response, client=self.client, path=job.path, params=job.params)
+                if job.response.failed:
+                    job.finish('failed')
+                    return False
+                page = job.response.first_page
+            else:
+                page = load_page(job.next_url, self.client.transport, timeout)
+                if page.status_code >= 300:
+                    raise ValueError(f'fetching page {job.pages_fetched + 1} of {job.path} failed '
+                                     f'with status {page.status_code}')
+        except TimeoutError:
+            if job.deadline is None or not job.deadline.expired:
+                raise
+            return self.__expire(job)
+
+        if job.done:
+            return False
+
+        job.pages_fetched += 1
+        job.rows_fetched += len(page.data)
+        job.next_url = page.next_url
+        job.buffer.put(page)
+        return job.next_url is not None
+
+    def __expire(self, job):
+        if job.response is not None:
+            # the api may serve smaller pages than were asked for
+            size = job.response.first_page.size or job.response.page_size
+            offset = (job.params.get('page_number', 1) - 1) * size + job.rows_fetched
+            job.cursor = job.response.cursor_at(offset, size, job.next_url)
+        job.finish('expired')
+        return False
+
+    def __repr__(self):
+        return f'Scheduler({len(self.threads)} workers, {len(self.ready)} ready)'
@@ -0,0 +1,48 @@
+import pytest
+
+from .adaptive import AdaptivePageSize
+
+
+def test_adaptive_page_size_checks_bounds():
+    with pytest.raises(ValueError):
+        AdaptivePageSize(minimum=0)
+    with pytest.raises(ValueError):
+        AdaptivePageSize(minimum=100, maximum=10)
+    with pytest.raises(ValueError):
+        AdaptivePageSize(target_seconds=0)
+
+
+def test_initial_page_size_defaults_to_minimum():
+    assert AdaptivePageSize(minimum=25).initial == 25
+    assert AdaptivePageSize(minimum=25, initial=5000).initial == 1000
+
+
+@pytest.mark.parametrize('elapsed,nbytes,expected', [
+    (0.5, 1000, 200),     # fast and small pages grow, but at most double
+    (1.0, 1000, 200),
+    (3.0, 1000, 66),
+    (20.0, 1000, 50),     # slow pages shrink, but at most halve
+    (1.0, 12_500, 80),    # large rows are limited by the byte budget
+    (None, None, 100),    # nothing measured so nothing changes
+])
+def test_next_page_size(elapsed, nbytes, expected):
+    sizer = AdaptivePageSize(target_seconds=2.0, max_page_bytes=10_000)
+    assert sizer.next_size(100, elapsed, nbytes, 100) == expected
+
+
+def test_next_page_size_stays_within_bounds():
+    sizer = AdaptivePageSize(minimum=10, maximum=150)
+    assert sizer.next_size(100, 0.001, 1, 100) == 150
+    assert sizer.next_size(15, 100.0, 1, 15) == 10
+    assert sizer.next_size(100, 1.0, 1, 0) == 100
+
+
+@pytest.mark.parametrize('offset,size,expected', [
+    (0, 70, (70, 1, 0)),
+    (100, 50, (50, 3, 0)),
+    (100, 70, (50, 3, 0)),
+    (103, 20, (20, 6, 3)),
+])
+def test_aligning_a_page_to_a_row_offset(offset, size, expected):
+    sizer = AdaptivePageSize(minimum=10, maximum=100)
+    assert sizer.align(offset, size) == expected
@@ -130,6 +130,21 @@ URL_EXAMPLES = [
       'filter[order]=score_desc&'
       'filter[type][]=book&'
       'filter[type][]=chapter'
+      )),
+
+    (('https://altmetric.com/explorer/api/research_outputs?'
+      'digest=6f4e3b50a2bc442199a2c32449b1754d&'
+      'key=xxxxyyyy&'
+      'include=journal,affiliations&'
+      'fields%5Bresearch-output%5D=title,altmetric-score&'
+      'fields%5Bjournal%5D=title'
+      ),
+     ('https://www.altmetric.com/explorer/api/research_outputs?'
+      'digest=aaabbb&'
+      'key=xxxxyyyy&'
+      'include=journal,affiliations&'
+      'fields[research-output]=title,altmetric-score&'
+      'fields[journal]=title'
       ))
 ]
 
@@ -0,0 +1,147 @@
+import pytest
+
+from .deadline import Deadline, as_deadline
+
+
+@pytest.fixture
+def api_client(api_client):
+    api_client.timeout = (1, 5)
+    api_client.transport.latency = 0.02
+    return api_client
+
+
+def test_deadline_cannot_be_in_the_past():
+    with pytest.raises(ValueError):
+        Deadline(-1)
+
+
+def test_as_deadline():
+    deadline = Deadline(5)
+    assert as_deadline(None) is None
+    assert as_deadline(deadline) is deadline
+    assert as_deadline(5).seconds == 5
+
+
+@pytest.mark.parametrize('timeout,expected', [
+    (None, 2),
+    (1, 1),
+    (30, 2),
+    ((1, 30), (1, 2)),
+    ((None, 1), (2, 1)),
+])
+def test_clamping_a_timeout_to_a_deadline(mocker, timeout, expected):
+    mocker.patch('time.monotonic', return_value=100.0)
+    deadline = Deadline(2)
+    assert deadline.clamp(timeout) == expected
+
+
+def test_client_passes_timeouts_to_the_transport(mocker, api_client):
+    spy = mocker.spy(api_client.transport, 'get')
+
+    list(api_client.get_mentions(page_size=10).data)
+
+    assert spy.call_count == 5
+    assert all(call.kwargs['timeout'] == (1, 5) for call in spy.call_args_list)
+
+
+def test_client_refuses_an_expired_deadline(api_client):
+    with pytest.raises(TimeoutError):
+        api_client.get_mentions(page_size=10, deadline=0)
+
+
+def test_walk_without_a_deadline_has_no_cursor(api_client, rows):
+    response = api_client.get_mentions(page_size=10)
+
+    assert list(response.data) == rows
+    assert response.cursor is None
+
+
+def test_walk_stops_at_the_deadline_and_resumes_from_the_cursor(api_client, rows):
+    response = api_client.get_mentions(page_size=10, deadline=0.05)
+
+    first = list(response.data)
+
+    assert 0 < len(first) < len(rows)
+    assert response.cursor.offset == len(first)
+    assert response.cursor.params['page_number'] == len(first) // 10 + 1
+
+    rest = list(api_client.resume(response.cursor).data)
+    assert first + rest == rows
+
+
+def test_walk_stops_when_a_request_outlives_the_deadline(api_client, rows):
+    api_client.transport.latency = 0.5
+    response = api_client.get_mentions(page_size=10, deadline=0.7)
+
+    assert list(response.data) == rows[:10]
+    assert response.cursor.offset == 10
+
+
+def test_timeouts_without_a_deadline_are_raised(api_client):
+    api_client.timeout = 0.1
+    api_client.transport.latency = 0.2
+
+    with pytest.raises(TimeoutError):
+        api_client.get_mentions(page_size=10)
+
+
+def test_pipeline_stops_at_the_deadline(api_client, rows):
+    response = api_client.get_mentions(page_size=10, deadline=0.05)
+
+    first = list(response.pipeline(fetchers=1, processes=1, max_in_flight=1))
+
+    assert 0 < len(first) < len(rows)
+    assert response.cursor.offset == len(first)
+
+
+def test_pipeline_cancels_fetches_when_the_consumer_stops(api_client, rows):
+    response = api_client.get_mentions(page_size=10)
+
+    result = response.pipeline(fetchers=1, processes=1, max_in_flight=2)
+    assert next(result) == rows[0]
+    result.close()
+
+    assert len(api_client.transport.requests) < 5
+
+
+def test_next_page_uses_the_timeout_of_the_page(api_client, mocker):
+    spy = mocker.spy(api_client.transport, 'get')
+    page = api_client.get_mentions(page_size=10).first_page
+
+    page.next_page()
+    page.next_page(timeout=2)
+
+    assert [call.kwargs['timeout'] for call in spy.call_args_list] == [(1, 5), (1, 5), 2]
+
+
+def test_cursors_keep_the_page_size_and_skip_to_the_offset(api_client, rows):
+    response = api_client.get_mentions(page_size=10)
+
+    cursor = response.cursor_at(37, 10)
+
+    assert cursor.params['page_size'] == 10
+    assert cursor.params['page_number'] == 4
+    assert cursor.skip == 7
+
+    resumed = api_client.resume(cursor)
+    assert list(resumed.data) == rows[37:]
+    assert len(resumed) == 13
+    assert resumed[0] == rows[37]
+    assert list(resumed.pipeline(processes=1)) == rows[37:]
+
+
+def test_resuming_when_the_api_serves_smaller_pages(api_client, rows):
+    api_client.transport.add_results(api_client, 'research_outputs/mentions', rows, 10, max_page_size=10)
+    response = api_client.get_mentions(page_size=50, deadline=0.05)
+
+    first = list(response.data)
+
+    assert 0 < len(first) < len(rows)
+    assert response.cursor.params['page_size'] == 10
+    assert first + list(api_client.resume(response.cursor).data) == rows
+
+
+def test_resuming_with_other_arguments(api_client, rows):
+    cursor = api_client.get_mentions(page_size=10).cursor_at(25, 10)
+
+    assert list(api_client.resume(cursor, page_size=5, deadline=10).data) == rows[25:]
@@ -0,0 +1,73 @@
+import pytest
+
+from .fields import Fields, select_included
+
+
+@pytest.fixture
+def research_output():
+    return {
+        'id': 1,
+        'type': 'research-output',
+        'attributes': {'title': 'A paper', 'altmetric-score': 10, 'oa-status': False},
+        'relationships': {
+            'journal': {'id': 'j1', 'type': 'journal'},
+            'affiliations': [{'id': 'a1', 'type': 'grid-affiliation'}],
+        }
+    }
+
+
+def test_fields_are_merged_per_type():
+    fields = Fields().add_fields('journal', ['title']).add_fields('journal', 'title,issns')
+    assert fields.items == {'journal': ['title', 'issns']}
+    assert len(fields) == 1
+
+
+def test_projecting_a_resource(research_output):
+    fields = Fields().add_fields('research-output', ['title', 'journal'])
+
+    result = fields.project(research_output)
+
+    assert result == {
+        'id': 1,
+        'type': 'research-output',
+        'attributes': {'title': 'A paper'},
+        'relationships': {'journal': {'id': 'j1', 'type': 'journal'}}
+    }
+    assert len(research_output['attributes']) == 3  # the original is not changed
+
+
+def test_projecting_leaves_other_types_and_projected_resources_alone(research_output):
+    assert Fields().add_fields('journal', ['title']).project(research_output) is research_output
+
+    fields = Fields().add_fields('research-output', ['title', 'altmetric-score', 'oa-status',
+                                                     'journal', 'affiliations'])
+    assert fields.project(research_output) is research_output
+
+
+@pytest.fixture
+def included():
+    return [
+        {'id': 'a1', 'type': 'grid-affiliation'},
+        {'id': 'j1', 'type': 'journal'},
+        {'id': 'x1', 'type': 'grid-funder'},
+    ]
+
+
+@pytest.mark.parametrize('include,expected', [
+    ([], []),
+    (['journal'], ['j1']),
+    (['journal', 'affiliations'], ['a1', 'j1']),
+    (['funders'], []),
+])
+def test_selecting_included_resources(research_output, included, include, expected):
+    result = select_included([research_output], included, include)
+    assert [resource['id'] for resource in result] == expected
+
+
+def test_selecting_included_resources_through_a_path(research_output, included):
+    mention = {'id': 'm1', 'type': 'mention', 'relationships': {
+        'research-outputs': [{'data': {'id': 1, 'type': 'research-output'}}]}}
+
+    result = select_included([mention], included + [research_output], ['research-outputs.journal'])
+
+    assert [resource['id'] for resource in result] == ['j1', 1]
@@ -0,0 +1,144 @@
+import pytest
+
+from .response import Response
+from .transport import MemoryResponse
+
+PATH = 'research_outputs/mentions'
+
+
+@pytest.fixture
+def rows():
+    return [{'id': n, 'type': 'mention'} for n in range(95)]
+
+
+@pytest.fixture
+def response(api_client):
+    return api_client.get_mentions(page_size=10)
+
+
+def requested_pages(api_client):
+    return [url.rsplit('page[number]=', 1)[-1].split('&')[0] for url in api_client.transport.requests[1:]]
+
+
+def test_length_of_a_response(response):
+    assert len(response) == 95
+    assert response
+
+
+def test_length_of_a_response_starting_part_way_through(api_client):
+    assert len(api_client.get_mentions(page_size=10, page_number=3)) == 75
+
+
+def test_length_of_a_failed_response():
+    response = Response(MemoryResponse(404, 'Not Found'))
+    assert len(response) == 0
+    assert response
+    with pytest.raises(IndexError):
+        response[0]
+
+
+def test_length_when_the_api_does_not_report_it():
+    with pytest.raises(TypeError):
+        len(Response(MemoryResponse(200, {'data': []})))
+
+
+def test_indexing_only_fetches_the_page_needed(api_client, response, rows):
+    assert response[0] == rows[0]
+    assert response[57] == rows[57]
+    assert response[-1] == rows[94]
+    assert requested_pages(api_client) == ['6', '10']
+
+
+def test_indexing_a_response_starting_part_way_through(api_client, rows):
+    response = api_client.get_mentions(page_size=10, page_number=3)
+    assert response[0] == rows[20]
+    assert response[15] == rows[35]
+
+
+@pytest.mark.parametrize('index', [95, -96])
+def test_indexing_out_of_range(response, index):
+    with pytest.raises(IndexError):
+        response[index]
+
+
+def test_indexing_with_other_types(response):
+    with pytest.raises(TypeError):
+        response['1']
+
+
+@pytest.mark.parametrize('key', [
+    slice(0, 5),
+    slice(8, 23),
+    slice(90, None),
+    slice(-3, None),
+    slice(50, 10, -7),
+    slice(200, 300),
+])
+def test_slicing(response, rows, key):
+    assert response[key] == rows[key]
+
+
+def test_recently_used_pages_are_cached(api_client, rows):
+    response = api_client.get(PATH, page_size=10, page_cache_size=2)
+
+    response[15]
+    response[25]
+    response[16]
+    response[35]  # page 3 was used less recently than page 2 so it is dropped
+    response[17]
+    response[27]
+
+    assert requested_pages(api_client) == ['2', '3', '4', '3']
+
+
+def test_indexing_applies_fieldsets(api_client):
+    rows = [{'id': 1, 'type': 'mention', 'attributes': {'post-type': 'tweet', 'external-id': 'x'}}]
+    fields = {'mention': ['post-type']}
+    api_client.transport.add_results(api_client, PATH, rows, 10, fields=fields)
+
+    response = api_client.get_mentions(page_size=10, fields=fields)
+
+    assert response[0]['attributes'] == {'post-type': 'tweet'}
+
+
+def test_length_of_an_aggregate_response(api_client):
+    sources = [{'id': source, 'type': 'source', 'meta': {'total': 100}} for source in ('msm', 'blog', 'tweet')]
+    api_client.transport.add(api_client.urlfor('research_outputs/attention'), {
+        'meta': {'response': {'status': 'ok', 'total-results': 48467237, 'total-pages': 1}},
+        'data': sources
+    })
+
+    response = api_client.get_attention_summary()
+
+    assert len(response) == 3
+    assert response[1] == sources[1]
+    assert response[:] == sources
+    with pytest.raises(IndexError):
+        response[3]
+    assert len(api_client.transport.requests) == 1
+
+
+def test_length_is_bounded_by_the_pages_of_the_response(api_client, rows):
+    api_client.transport.add(api_client.urlfor(PATH, page_size=10), {
+        'meta': {'response': {'total-results': 1000, 'total-pages': 5}}, 'data': rows[:10]})
+
+    assert len(api_client.get_mentions(page_size=10)) == 50
+
+
+def test_indexing_when_the_api_serves_smaller_pages(api_client, rows):
+    api_client.transport.add_results(api_client, PATH, rows, 10, max_page_size=10)
+    response = api_client.get_mentions(page_size=50)
+
+    assert response.page_size == 10
+    assert len(response) == 95
+    assert response[10] == rows[10]
+    assert response[50] == rows[50]
+    assert response[-1] == rows[94]
+
+
+def test_indexing_without_a_page_cache(api_client, rows):
+    response = api_client.get(PATH, page_size=10, page_cache_size=0)
+
+    assert response[15] == rows[15]
+    assert response[16] == rows[16]
+    assert requested_pages(api_client) == ['2', '2']
@@ -0,0 +1,101 @@
+import pytest
+
+from .mirror import Mirror
+from .response import Response
+from .transport import MemoryResponse
+
+
+def research_output(id, score, journal='j1'):
+    return {
+        'id': id,
+        'type': 'research-output',
+        'attributes': {'title': f'Paper {id}', 'altmetric-score': score},
+        'relationships': {
+            'journal': {'id': journal, 'type': 'journal'},
+            'affiliations': [{'id': 'a1', 'type': 'grid-affiliation'}, {'id': 'a2', 'type': 'grid-affiliation'}],
+        }
+    }
+
+
+@pytest.fixture
+def response():
+    return Response(MemoryResponse(200, {
+        'data': [research_output(1, 10), research_output(2, 20, journal='j2')],
+        'included': [
+            {'id': 'j1', 'type': 'journal', 'attributes': {'title': 'Journal 1'}},
+            {'id': 'j2', 'type': 'journal', 'attributes': {'title': 'Journal 2'}},
+            {'id': 'a1', 'type': 'grid-affiliation', 'attributes': {'name': 'Affiliation 1'}},
+        ]
+    }))
+
+
+@pytest.fixture
+def mirror():
+    with Mirror(':memory:') as mirror:
+        yield mirror
+
+
+def test_storing_a_response(mirror, response):
+    assert mirror.store(response) == {'inserted': 5, 'updated': 0, 'unchanged': 0}
+
+    assert mirror.get('research-output', 1) == research_output(1, 10)
+    assert mirror.get('journal', 'j2')['attributes'] == {'title': 'Journal 2'}
+    assert mirror.get('journal', 'missing') is None
+
+
+def test_refreshing_only_writes_changed_resources(mirror, response):
+    mirror.store(response)
+    before = mirror.query("SELECT updated_at FROM resources WHERE type = 'journal' AND id = 'j1'")
+
+    assert mirror.upsert([research_output(1, 10), research_output(2, 99), research_output(3, 5)]) == {
+        'inserted': 1, 'updated': 1, 'unchanged': 1}
+    assert mirror.get('research-output', 2)['attributes']['altmetric-score'] == 99
+    assert mirror.query("SELECT updated_at FROM resources WHERE type = 'journal' AND id = 'j1'") == before
+
+
+def test_finding_resources_by_attribute(mirror, response):
+    mirror.store(response)
+
+    assert [resource['id'] for resource in mirror.find('research-output', {'altmetric-score': 20})] == [2]
+    assert len(mirror.find('journal')) == 2
+
+
+def test_finding_resources_uses_the_attribute_indexes(mirror):
+    plan = mirror.query("EXPLAIN QUERY PLAN SELECT resource FROM resources WHERE type = 'research-output' "
+                        "AND json_extract(resource, '$.attributes.\"altmetric-score\"') = 20")
+    assert any('resources_research_output_altmetric_score' in row['detail'] for row in plan)
+
+
+def test_relationships_are_stored_in_a_join_table(mirror, response):
+    mirror.store(response)
+
+    assert [resource['id'] for resource in mirror.related('research-output', 2, 'journal')] == ['j2']
+    # a2 was not included so only a1 can be returned
+    assert [resource['id'] for resource in mirror.related('research-output', 1, 'affiliations')] == ['a1']
+    assert mirror.query('SELECT COUNT(*) AS count FROM relationships') == [{'count': 6}]
+
+    mirror.upsert([research_output(2, 20, journal='j1')])
+    assert [resource['id'] for resource in mirror.related('research-output', 2, 'journal')] == ['j1']
+
+
+def test_storing_every_page_in_batches(mirror, api_client):
+    rows = [research_output(id, id) for id in range(95)]
+    api_client.transport.add_results(api_client, 'research_outputs', rows, 10)
+
+    counts = mirror.store(api_client.get_research_outputs(page_size=10), batch_size=30)
+
+    assert counts == {'inserted': 95, 'updated': 0, 'unchanged': 0}
+    assert mirror.query("SELECT COUNT(*) AS count FROM resources WHERE type = 'research-output'") == [{'count': 95}]
+    assert len(api_client.transport.requests) == 10
+
+
+def test_storing_sparse_fieldsets_merges_into_the_mirror(mirror, response):
+    mirror.store(response)
+    sparse = Response(MemoryResponse(200, {
+        'data': [research_output(1, 10), {**research_output(2, 20), 'attributes': {'title': 'Renamed'}}],
+    }), params={'fields': {'research-output': ['title']}})
+
+    assert mirror.store(sparse) == {'inserted': 0, 'updated': 1, 'unchanged': 1}
+    assert mirror.get('research-output', 1) == research_output(1, 10)
+    assert mirror.get('research-output', 2)['attributes'] == {'title': 'Renamed', 'altmetric-score': 20}
+    assert [resource['id'] for resource in mirror.related('research-output', 2, 'journal')] == ['j2']
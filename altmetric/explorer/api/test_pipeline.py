@@ -0,0 +1,108 @@
+import json
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from .pipeline import decode_page
+
+PATH = 'research_outputs/mentions'
+
+
+@pytest.fixture
+def rows():
+    return [{'id': n} for n in range(95)]
+
+
+def double_id(row):
+    return row['id'] * 2
+
+
+def test_decoding_a_page():
+    content = json.dumps({'data': [{'id': 1}, {'id': 2}]}).encode('utf-8')
+    assert decode_page(content) == [{'id': 1}, {'id': 2}]
+    assert decode_page(content, double_id) == [2, 4]
+    assert decode_page(b'{}', double_id) == []
+
+
+@pytest.mark.parametrize('max_in_flight', [1, 3, 20])
+def test_pipeline_returns_transformed_rows_in_order(api_client, max_in_flight):
+    response = api_client.get_mentions(page_size=10)
+
+    result = list(response.pipeline(double_id, fetchers=3, processes=2, max_in_flight=max_in_flight))
+    assert result == [n * 2 for n in range(95)]
+    assert len(api_client.transport.requests) == 10
+
+
+def test_pipeline_of_a_single_page(api_client):
+    response = api_client.get_mentions(page_size=100)
+
+    assert len(list(response.pipeline())) == 95
+    assert len(api_client.transport.requests) == 1
+
+
+def test_pipeline_rejects_an_empty_window(api_client):
+    response = api_client.get_mentions(page_size=10)
+
+    with pytest.raises(ValueError):
+        list(response.pipeline(max_in_flight=0))
+
+
+def test_pipeline_raises_when_a_page_fails(api_client):
+    api_client.transport.add(api_client.urlfor(PATH, page_size=10, page_number=2),
+                             {'errors': [{'status': '429'}]}, status_code=429)
+    response = api_client.get_mentions(page_size=10)
+
+    with pytest.raises(ValueError, match='429'):
+        list(response.pipeline(processes=1))
+
+
+def test_pipeline_follows_links_when_total_pages_is_not_reported(api_client, rows):
+    for number in range(1, 4):
+        body = {'data': rows[(number - 1) * 10:number * 10], 'links': {}}
+        if number < 3:
+            body['links']['next'] = api_client.urlfor(PATH, page_size=10, page_number=number + 1)
+        api_client.transport.add(api_client.urlfor(PATH, page_size=10, page_number=number), body)
+    response = api_client.get_mentions(page_size=10, page_number=1)
+
+    assert list(response.pipeline(processes=1, max_in_flight=2)) == rows[:30]
+
+
+class DeferredPool:
+    '''Stands in for the process pool, holding back decoding until `batch` pages are waiting'''
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.waiting = []
+        self.most_waiting = 0
+        self.lock = threading.Lock()
+        self.timer = threading.Timer(1, self.release)
+        self.timer.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        with self.lock:
+            self.waiting.append((future, fn, args))
+            self.most_waiting = max(self.most_waiting, len(self.waiting))
+            full = len(self.waiting) >= self.batch
+        if full:
+            self.release()
+        return future
+
+    def release(self):
+        with self.lock:
+            waiting, self.waiting, self.batch = self.waiting, [], 1
+        for future, fn, args in waiting:
+            future.set_result(fn(*args))
+
+    def shutdown(self, **kwargs):
+        self.timer.cancel()
+
+
+def test_pipeline_decodes_more_pages_at_once_than_there_are_fetchers(api_client, mocker):
+    pool = DeferredPool(4)
+    mocker.patch('altmetric.explorer.api.pipeline.ProcessPoolExecutor', return_value=pool)
+    response = api_client.get_mentions(page_size=10)
+
+    assert len(list(response.pipeline(fetchers=1, max_in_flight=4))) == 95
+    assert pool.most_waiting == 4
@@ -16,7 +16,13 @@ from .query import Query
     ({'timeframe': '3d'},
         'filter[timeframe]=3d'),
     ({'foo': 'bar', 'key': 'key123', 'digest': 'digestabc'},
-        'key=key123&digest=digestabc&filter[foo]=bar')
+        'key=key123&digest=digestabc&filter[foo]=bar'),
+    ({'include': ['journal', 'affiliations']}, 'include=journal,affiliations'),
+    ({'include': 'journal'}, 'include=journal'),
+    ({'fields': {'research-output': ['title', 'altmetric-score'], 'journal': 'title'}},
+        'fields[research-output]=title,altmetric-score&fields[journal]=title'),
+    ({'timeframe': '3d', 'fields': {'mention': ['post-type']}, 'include': ['author']},
+        'include=author&filter[timeframe]=3d&fields[mention]=post-type')
 ])
 def test_query_string(params, query_string):
     assert str(Query(**params)) == query_string
@@ -35,6 +41,8 @@ def test_query_string(params, query_string):
     # param values do not need to be sorted alphabetically
     ({'list': ['c', 'b', 'a']}, 'list|c|b|a'),
     ({'list': ('a', 'b', 'c')}, 'list|a|b|c'),
+    # fieldsets and includes are not filters so are not part of the digest
+    ({'q': 'hello', 'fields': {'journal': ['title']}, 'include': ['journal']}, 'q|hello'),
 
 ])
 def test_message(params, message):
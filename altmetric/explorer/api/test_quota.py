@@ -0,0 +1,137 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from .client import Client
+from .quota import RateLimitedTransport, SQLiteRateBudget
+from .transport import MemoryTransport
+
+
+@pytest.fixture
+def budget_path(tmp_path):
+    return str(tmp_path / 'budget.sqlite')
+
+
+def take_tokens(path, count, results):
+    budget = SQLiteRateBudget(path, rate=20, burst=1)
+    for _ in range(count):
+        budget.acquire()
+        results.put(time.time())
+
+
+def test_budget_checks_its_rate(budget_path):
+    with pytest.raises(ValueError):
+        SQLiteRateBudget(budget_path, rate=0)
+
+
+def test_budget_allows_a_burst_then_limits_the_rate(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=10, burst=3)
+
+    started = time.monotonic()
+    for _ in range(3):
+        budget.acquire()
+    assert time.monotonic() - started < 0.1
+
+    for _ in range(3):
+        budget.acquire()
+    assert time.monotonic() - started >= 0.25
+
+
+def test_budget_needs_room_for_a_whole_token(budget_path):
+    with pytest.raises(ValueError):
+        SQLiteRateBudget(budget_path, rate=5, burst=0.5)
+
+
+def test_budget_at_a_fractional_rate_holds_a_whole_token(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=0.5)
+
+    assert budget.burst == 1
+    budget.acquire(timeout=0.5)
+
+
+def test_budget_times_out(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=1, burst=1)
+    budget.acquire()
+
+    with pytest.raises(TimeoutError):
+        budget.acquire(timeout=0.1)
+
+    # the waiter that timed out does not hold up anyone else
+    with budget.transaction() as db:
+        assert db.execute('SELECT COUNT(*) FROM waiters').fetchone()[0] == 0
+
+
+def test_budget_serves_lower_priority_values_first(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=20, burst=1, poll_interval=0.01)
+    budget.acquire()
+    served = []
+
+    def worker(priority):
+        budget.acquire(priority)
+        served.append(priority)
+
+    threads = [threading.Thread(target=worker, args=(priority,)) for priority in (5, 5, 0)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert served == [0, 5, 5]
+
+
+def test_budget_ignores_stale_waiters(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=100, stale_after=1)
+    with budget.transaction() as db:
+        db.execute('INSERT INTO waiters (priority, seen) VALUES (-1, ?)', (time.time() - 5,))
+
+    budget.acquire(timeout=0.5)
+
+
+def test_slow_budgets_do_not_drop_live_waiters(budget_path):
+    # at this rate the next token is further away than stale_after
+    budget = SQLiteRateBudget(budget_path, rate=0.5, burst=1, stale_after=0.3)
+    budget.acquire()
+
+    def worker(timeout):
+        with pytest.raises(TimeoutError):
+            budget.acquire(timeout=timeout)
+
+    # the first waiter to give up checks for stale waiters on its way out
+    threads = [threading.Thread(target=worker, args=(timeout,)) for timeout in (0.5, 1.2, 1.2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.8)
+    with budget.transaction() as db:
+        assert db.execute('SELECT COUNT(*) FROM waiters').fetchone()[0] == 2
+    for thread in threads:
+        thread.join()
+
+
+def test_budget_is_shared_between_processes(budget_path):
+    SQLiteRateBudget(budget_path, rate=20, burst=1)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=take_tokens, args=(budget_path, 4, results)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    times = sorted(results.get() for _ in range(8))
+    # 8 tokens at 20 per second with no burst to speak of take at least 7 intervals
+    assert times[-1] - times[0] >= 7 / 20 * 0.9
+
+
+def test_client_attaches_to_a_budget(budget_path):
+    budget = SQLiteRateBudget(budget_path, rate=100)
+    transport = MemoryTransport()
+    client = Client('https://www.altmetric.com/explorer/api', 'key', 'secret',
+                    transport=transport, rate_budget=budget, priority=3)
+
+    assert type(client.transport) is RateLimitedTransport
+    assert client.transport.priority == 3
+
+    client.get_mentions()
+    assert len(transport.requests) == 1
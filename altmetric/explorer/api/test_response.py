@@ -1,7 +1,9 @@
 import pytest
 from mergedeep import merge
 
+from .adaptive import AdaptivePageSize
 from .response import Response
+from .transport import canonical_url
 
 
 class FakeApiResponse:
@@ -20,7 +22,7 @@ class FakeApiResponse:
 
 
 def fake_get(attrs):
-    def fn(url):
+    def fn(url, timeout=None):
         try:
             return attrs[url]
         except KeyError:
@@ -91,6 +93,26 @@ def test_response_returns_meta_from_first_page(mocker, page1, page2):
     assert response.meta == {'from': 'page1'}
 
 
+def test_response_applies_fields_and_include_the_api_ignored():
+    raw_response = FakeApiResponse(200, {
+        'data': [{'id': 1, 'type': 'research-output',
+                  'attributes': {'title': 'A paper', 'altmetric-score': 10},
+                  'relationships': {'journal': {'id': 'j1', 'type': 'journal'}}}],
+        'included': [{'id': 'j1', 'type': 'journal', 'attributes': {'title': 'A journal', 'issns': []}},
+                     {'id': 'f1', 'type': 'grid-funder', 'attributes': {'name': 'A funder'}}]
+    })
+
+    response = Response(raw_response, params={
+        'fields': {'research-output': ['title', 'journal'], 'journal': ['title']},
+        'include': 'journal'
+    })
+
+    assert list(response.data) == [{'id': 1, 'type': 'research-output',
+                                    'attributes': {'title': 'A paper'},
+                                    'relationships': {'journal': {'id': 'j1', 'type': 'journal'}}}]
+    assert list(response.included) == [{'id': 'j1', 'type': 'journal', 'attributes': {'title': 'A journal'}}]
+
+
 def test_api_failure_data(multiple_choices):
     response = Response(multiple_choices)
 
@@ -114,3 +136,55 @@ def test_api_ok_predicate(not_found):
 
     assert response.failed
     assert not response.ok
+
+
+PATH = 'research_outputs/mentions'
+
+
+def requested_sizes(api_client):
+    return [(int(query['page[size]']), int(query['page[number]']))
+            for query in (dict(canonical_url(url)[2]) for url in api_client.transport.requests[1:])]
+
+
+def test_adaptive_page_size_keeps_rows_in_order(api_client):
+    rows = [{'id': n} for n in range(1000)]
+    api_client.transport.add_results(api_client, PATH, rows, 10)
+
+    # pages arrive far faster than the target, so each page is twice the size of the last
+    sizer = AdaptivePageSize(minimum=10, maximum=300, target_seconds=1000.0)
+    response = api_client.get(PATH, page_size=10, page_sizer=sizer)
+
+    assert list(response.data) == rows
+    # the page size grows as fast as the row offset allows a page to start at it
+    assert requested_sizes(api_client) == [
+        (10, 2), (20, 2), (40, 2), (80, 2), (160, 2), (160, 3), (240, 3), (240, 4), (240, 5)]
+
+
+def test_adaptive_page_size_skips_rows_already_returned(api_client):
+    rows = [{'id': n} for n in range(50)]
+    api_client.transport.add_results(api_client, PATH, rows, 10)
+
+    # pages are far over the byte budget, so each page is half the size of the last
+    sizer = AdaptivePageSize(minimum=7, maximum=30, max_page_bytes=100)
+    response = api_client.get(PATH, page_size=30, page_sizer=sizer)
+
+    assert list(response.data) == rows
+    assert requested_sizes(api_client) == [(15, 3), (7, 7), (7, 8)]
+
+
+def test_adaptive_page_size_requires_a_client(page1):
+    with pytest.raises(ValueError):
+        Response(page1, page_sizer=AdaptivePageSize())
+
+
+def test_adaptive_page_size_respects_the_largest_page_the_api_serves(api_client):
+    rows = [{'id': n} for n in range(200)]
+    api_client.transport.add_results(api_client, PATH, rows, 10, max_page_size=25)
+
+    sizer = AdaptivePageSize(minimum=10, maximum=100, target_seconds=1000.0)
+    response = api_client.get(PATH, page_size=10, page_sizer=sizer)
+
+    assert list(response.data) == rows
+    assert sizer.maximum == 25
+    # page 2 of 40 rows was served with 25 rows so it was fetched again at that size
+    assert requested_sizes(api_client)[:5] == [(10, 2), (20, 2), (40, 2), (20, 3), (20, 4)]
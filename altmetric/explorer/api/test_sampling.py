@@ -0,0 +1,113 @@
+import pytest
+
+from .sampling import Estimate, Stratum, allocate, stratum_total
+
+PATH = 'research_outputs/mentions'
+
+
+@pytest.fixture
+def rows():
+    # 1,000 rows in 100 pages, scored so that the first half of the result is 'high'
+    return [{'id': n, 'attributes': {'score': 'high' if n < 500 else 'low'}} for n in range(1000)]
+
+
+@pytest.mark.parametrize('total_pages,pages,strata,expected', [
+    (100, 10, 1, [(range(1, 101), 10)]),
+    (100, 10, 2, [(range(1, 51), 5), (range(51, 101), 5)]),
+    (10, 4, 4, [(range(1, 3), 2), (range(3, 6), 2), (range(6, 8), 2), (range(8, 11), 2)]),
+    (3, 10, 5, [(range(1, 2), 1), (range(2, 3), 1), (range(3, 4), 1)]),
+    (0, 10, 2, []),
+])
+def test_allocating_pages_to_strata(total_pages, pages, strata, expected):
+    assert allocate(total_pages, pages, strata) == expected
+
+
+def test_stratum_total():
+    assert stratum_total(10, [2, 4]) == (30, pytest.approx(100 * 0.8 * 2 / 2))
+    assert stratum_total(2, [2, 4]) == (6, 0)
+    assert stratum_total(10, [3]) == (30, 0)
+
+
+def test_estimate_interval():
+    estimate = Estimate(100, 25)
+    assert estimate.stderr == 5
+    low, high = estimate.interval
+    assert low == pytest.approx(100 - 1.96 * 5, abs=0.01)
+    assert high == pytest.approx(100 + 1.96 * 5, abs=0.01)
+
+
+def test_sampling_only_fetches_the_sampled_pages(api_client):
+    sample = api_client.sample(PATH, pages=10, seed=1, page_size=10)
+
+    assert sample.total_pages == 100
+    assert sample.requests == 10
+    assert len(api_client.transport.requests) <= 11
+    assert len(list(sample.data)) == 100
+
+
+def test_sampling_is_repeatable_with_a_seed(api_client):
+    first = [row['id'] for row in api_client.sample(PATH, pages=0.1, seed=42, page_size=10).data]
+    second = [row['id'] for row in api_client.sample(PATH, pages=0.1, seed=42, page_size=10).data]
+    assert first == second
+
+
+def test_sampled_rows_are_tagged_with_weights(api_client):
+    sample = api_client.sample(PATH, pages=10, strata=2, seed=1, page_size=10)
+
+    row = next(sample.data)
+    assert row['meta'] == {'sampling-weight': 10.0, 'sampling-stratum': 0}
+    assert 'meta' in row and 'attributes' in row
+    assert sum(row['meta']['sampling-weight'] for row in sample.data) == 1000
+
+
+def test_stratified_estimates(api_client):
+    sample = api_client.sample(PATH, pages=10, strata=2, seed=7, page_size=10)
+
+    high = sample.estimate_count(lambda row: row['attributes']['score'] == 'high')
+    assert high.value == 500
+    assert high.variance == 0  # each stratum is homogeneous
+
+    assert sample.estimate_proportion(lambda row: row['attributes']['score'] == 'low').value == 0.5
+    counts = sample.estimate_counts(lambda row: row['attributes']['score'])
+    assert {key: estimate.value for key, estimate in counts.items()} == {'high': 500, 'low': 500}
+
+
+def test_unstratified_estimates_have_confidence_intervals(api_client):
+    sample = api_client.sample(PATH, pages=20, seed=3, page_size=10)
+
+    estimate = sample.estimate_count(lambda row: row['attributes']['score'] == 'high')
+    low, high = estimate.interval
+    assert estimate.variance > 0
+    assert low < 500 < high
+    assert sample.estimate_count().value == 1000
+
+
+def test_sampling_a_failed_query(api_client):
+    with pytest.raises(ValueError, match='404'):
+        api_client.sample('research_outputs/missing', pages=10)
+
+
+def test_sampling_an_empty_result(api_client):
+    api_client.transport.add(api_client.urlfor(PATH, page_size=10), {
+        'meta': {'response': {'total-results': 0, 'total-pages': 0}}, 'data': []})
+
+    sample = api_client.sample(PATH, pages=0.1, strata=2, page_size=10)
+
+    assert (sample.total_pages, sample.requests) == (0, 0)
+    assert list(sample.data) == []
+    assert sample.estimate_count().value == 0
+    assert sample.estimate_proportion(lambda row: True).value == 0
+    assert sample.estimate_counts(lambda row: row['id']) == {}
+    assert Stratum(0, range(1, 3)).weight == 0
+
+
+def test_whole_numbers_of_pages_are_not_fractions(api_client):
+    assert api_client.sample(PATH, pages=1.0, seed=1, page_size=10).requests == \
+        api_client.sample(PATH, pages=1, seed=1, page_size=10).requests == 2
+    assert api_client.sample(PATH, pages=0.5, seed=1, page_size=10).requests == 50
+
+
+@pytest.mark.parametrize('pages', [0, -1, 0.0])
+def test_sampling_needs_a_positive_number_of_pages(api_client, pages):
+    with pytest.raises(ValueError):
+        api_client.sample(PATH, pages=pages, page_size=10)
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from .scheduler import BULK, INTERACTIVE, Scheduler
+
+MENTIONS = 'research_outputs/mentions'
+JOURNALS = 'research_outputs/journals'
+
+
+@pytest.fixture
+def mentions(rows):
+    return rows
+
+
+@pytest.fixture
+def journals():
+    return [{'id': n, 'type': 'journal'} for n in range(5)]
+
+
+@pytest.fixture
+def api_client(api_client, journals):
+    api_client.transport.latency = 0.02
+    api_client.transport.add_results(api_client, JOURNALS, journals, 10)
+    return api_client
+
+
+def test_running_a_job(api_client, mentions):
+    with Scheduler(api_client, workers=2) as scheduler:
+        job = scheduler.submit(MENTIONS, page_size=10)
+
+        assert list(job.data) == mentions
+        assert job.wait(1)
+        assert job.state == 'complete'
+        assert job.progress == 1.0
+        assert job.total_pages == 5
+        assert (job.pages_fetched, job.rows_fetched) == (5, 50)
+
+
+def test_interactive_jobs_preempt_bulk_jobs_between_pages(api_client, mentions, journals):
+    with Scheduler(api_client, workers=1, max_buffered_pages=10) as scheduler:
+        bulk = scheduler.submit(MENTIONS, priority=BULK, page_size=10)
+        while bulk.pages_fetched == 0:
+            time.sleep(0.005)
+        interactive = scheduler.submit(JOURNALS, priority=INTERACTIVE, page_size=10)
+
+        assert list(interactive.data) == journals
+        assert not bulk.done
+        assert list(bulk.data) == mentions
+
+    journal_request = next(index for index, url in enumerate(api_client.transport.requests) if 'journals' in url)
+    assert journal_request <= 2
+
+
+def test_jobs_with_the_same_priority_take_turns(api_client):
+    api_client.transport.add_results(api_client, MENTIONS, [{'id': 'x'}] * 20, 10, timeframe='1y')
+    with Scheduler(api_client, workers=1, max_buffered_pages=10) as scheduler:
+        first = scheduler.submit(MENTIONS, page_size=10)
+        second = scheduler.submit(MENTIONS, page_size=10, timeframe='1y')
+        first.wait(2)
+        second.wait(2)
+
+    assert (first.state, second.state) == ('complete', 'complete')
+    paths = ['1y' in url for url in api_client.transport.requests]
+    assert paths[:4] == [False, True, False, True]
+
+
+def test_cancelling_a_job(api_client):
+    with Scheduler(api_client, workers=1) as scheduler:
+        job = scheduler.submit(MENTIONS, page_size=10)
+        next(job.data)
+        job.cancel()
+
+        assert job.wait(1)
+        assert job.state == 'cancelled'
+        assert job.pages_fetched < 5
+
+
+def test_a_slow_consumer_holds_back_its_job(api_client):
+    with Scheduler(api_client, workers=2, max_buffered_pages=1) as scheduler:
+        job = scheduler.submit(MENTIONS, page_size=10)
+        time.sleep(0.2)
+        assert job.pages_fetched == 1
+
+        assert len(list(job.data)) == 50
+
+
+def test_jobs_expire_at_their_deadline_with_a_cursor(api_client, mentions):
+    with Scheduler(api_client, workers=1, max_buffered_pages=10) as scheduler:
+        job = scheduler.submit(MENTIONS, deadline=0.05, page_size=10)
+        rows = list(job.data)
+
+    assert job.state == 'expired'
+    assert 0 < len(rows) < 50
+    assert job.cursor.offset == len(rows)
+    assert rows + list(api_client.resume(job.cursor).data) == mentions
+
+
+def test_failed_jobs(api_client):
+    with Scheduler(api_client, workers=1) as scheduler:
+        missing = scheduler.submit('research_outputs/missing')
+        assert list(missing.data) == []
+        assert missing.state == 'failed'
+        assert missing.response.status_code == 404
+
+        api_client.timeout = 0.001
+        slow = scheduler.submit(MENTIONS, page_size=10)
+        with pytest.raises(TimeoutError):
+            list(slow.data)
+        assert slow.state == 'failed'
+
+
+def test_failed_pages_fail_the_job(api_client, mentions):
+    api_client.transport.add(api_client.urlfor(MENTIONS, page_size=10, page_number=2),
+                             {'errors': [{'status': '429'}]}, status_code=429)
+    with Scheduler(api_client, workers=1) as scheduler:
+        job = scheduler.submit(MENTIONS, page_size=10)
+        rows = []
+        with pytest.raises(ValueError, match='429'):
+            rows.extend(job.data)
+
+    assert rows == mentions[:10]
+    assert job.state == 'failed'
+    assert job.progress < 1
+
+
+def test_jobs_held_back_by_their_consumer_still_expire(api_client):
+    with Scheduler(api_client, workers=1, max_buffered_pages=1) as scheduler:
+        job = scheduler.submit(MENTIONS, deadline=0.3, page_size=10)
+        next(job.data)
+
+        assert job.wait(2)
+        assert job.state == 'expired'
+        assert job.cursor.offset == job.rows_fetched
+
+
+def test_leaving_the_scheduler_cancels_unfinished_jobs(api_client):
+    started = time.monotonic()
+    with Scheduler(api_client, workers=1, max_buffered_pages=1) as scheduler:
+        job = scheduler.submit(MENTIONS, page_size=10)
+        next(job.data)
+
+    assert time.monotonic() - started < 1
+    assert job.state == 'cancelled'
+
+
+def test_submitting_to_a_closed_scheduler(api_client):
+    scheduler = Scheduler(api_client, workers=1)
+    scheduler.shutdown()
+    with pytest.raises(ValueError):
+        scheduler.submit(MENTIONS)
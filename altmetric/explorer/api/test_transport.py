@@ -0,0 +1,118 @@
+import pytest
+import requests
+
+from .client import Client
+from .transport import HTTP2Transport, MemoryTransport, RequestsTransport, canonical_url
+
+
+def test_client_uses_requests_by_default():
+    client = Client('https://www.altmetric.com/explorer/api', 'key', 'secret')
+    assert type(client.transport) is RequestsTransport
+
+
+def test_requests_transport_uses_the_session(mocker):
+    session = mocker.Mock()
+    RequestsTransport(session).get('https://example.com/')
+    session.get.assert_called_once_with('https://example.com/', timeout=None)
+
+
+def test_requests_transport_raises_timeout_errors(mocker):
+    mocker.patch('requests.get', side_effect=requests.exceptions.ReadTimeout())
+    with pytest.raises(TimeoutError):
+        RequestsTransport().get('https://example.com/', timeout=(1, 2))
+
+
+def test_http2_transport_requires_httpx(mocker):
+    mocker.patch.dict('sys.modules', {'httpx': None})
+    with pytest.raises(ImportError, match='httpx'):
+        HTTP2Transport()
+
+
+@pytest.fixture
+def httpx(mocker):
+    httpx = mocker.Mock()
+    httpx.TimeoutException = type('TimeoutException', (Exception,), {})
+    mocker.patch.dict('sys.modules', {'httpx': httpx})
+    return httpx
+
+
+def test_http2_transport_uses_an_http2_client(httpx):
+    transport = HTTP2Transport(base_url='https://example.com')
+    httpx.Client.assert_called_once_with(http2=True, base_url='https://example.com')
+
+    assert transport.get('https://example.com/a') is httpx.Client.return_value.get.return_value
+    httpx.Client.return_value.get.assert_called_once_with('https://example.com/a', timeout=httpx.USE_CLIENT_DEFAULT)
+
+
+def test_http2_transport_converts_timeouts(httpx):
+    transport = HTTP2Transport()
+
+    transport.get('https://example.com/a', timeout=(1, 2))
+    httpx.Timeout.assert_called_once_with(2, connect=1)
+    assert httpx.Client.return_value.get.call_args.kwargs['timeout'] is httpx.Timeout.return_value
+
+    transport.get('https://example.com/a', timeout=3)
+    assert httpx.Client.return_value.get.call_args.kwargs['timeout'] == 3
+
+    httpx.Client.return_value.get.side_effect = httpx.TimeoutException()
+    with pytest.raises(TimeoutError):
+        transport.get('https://example.com/a', timeout=1)
+
+
+@pytest.mark.parametrize('a,b', [
+    ('https://example.com/a?x=1&y=2', 'https://example.com/a?y=2&x=1'),
+    ('https://example.com/a?page[size]=1', 'https://example.com/a?page%5Bsize%5D=1'),
+])
+def test_canonical_urls(a, b):
+    assert canonical_url(a) == canonical_url(b)
+
+
+def test_memory_transport_serves_missing_pages_as_not_found():
+    response = MemoryTransport().get('https://example.com/missing')
+    assert response.status_code == 404
+    assert 'errors' in response.json()
+
+
+def test_all_pages_go_through_the_transport(api_client, rows):
+    response = api_client.get_mentions(page_size=10)
+
+    assert response.ok
+    assert response.meta['total-results'] == 50
+    assert list(response.data) == rows
+    assert len(api_client.transport.requests) == 5
+
+
+def test_memory_transport_builds_pages_of_any_size(api_client, rows):
+    response = api_client.get_mentions(page_size=4, page_number=2)
+    assert response.first_page.data == rows[4:8]
+    assert response.first_page.size == 4
+    assert response.meta['total-pages'] == 13
+
+    assert api_client.get_mentions(page_size=10, page_number=6).status_code == 404
+    assert api_client.get_mentions(page_size=10, timeframe='3d').status_code == 404
+
+
+def test_memory_transport_clamps_page_sizes(api_client, rows):
+    api_client.transport.add_results(api_client, 'research_outputs/mentions', rows, 10, max_page_size=5)
+
+    response = api_client.get_mentions(page_size=20)
+    assert response.first_page.data == rows[:5]
+    assert response.first_page.size == 5
+
+
+def test_memory_transport_prefers_pages_added_directly(api_client):
+    api_client.transport.add(api_client.urlfor('research_outputs/mentions', page_size=10, page_number=2),
+                             {'errors': [{'status': '429'}]}, status_code=429)
+
+    assert api_client.get_mentions(page_size=10, page_number=2).status_code == 429
+    assert api_client.get_mentions(page_size=10, page_number=3).ok
+
+
+def test_memory_transport_serves_failures(api_client):
+    api_client.transport = MemoryTransport().add(
+        api_client.urlfor('research_outputs'), 'Forbidden', status_code=403)
+
+    response = api_client.get_research_outputs()
+
+    assert response.failed
+    assert response.text == 'Forbidden'
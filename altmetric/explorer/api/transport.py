@@ -0,0 +1,268 @@
+import json
+import time
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+
+
+class Transport:
+    '''Base class for the HTTP layer used by a Client to fetch pages.
+
+    A transport only needs to implement `get`, returning an object that behaves
+    like a `requests.Response`: it must have `status_code`, `text`, `content`
+    and `json()`, and may have `elapsed`.  A request that times out must raise
+    the built-in `TimeoutError`.
+    '''
+
+    def get(self, url, timeout=None):
+        '''Fetch a url
+
+        Args:
+            url (string): the (signed) url to fetch
+            timeout (float or tuple, optional): seconds to wait for the server, either
+                                                for both connecting and reading or as a
+                                                (connect, read) tuple. Defaults to None (wait forever).
+
+        Returns:
+            requests.Response: or any object with the same attributes
+
+        Raises:
+            TimeoutError: if the server does not respond in time
+        '''
+        raise NotImplementedError
+
+    def close(self):
+        '''Release any connections held by the transport'''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    '''Fetches pages with the `requests` library. This is the default transport.'''
+
+    def __init__(self, session=None):
+        '''Initialise a RequestsTransport
+
+        Args:
+            session (requests.Session, optional): a session to re-use connections between
+                                                  pages. Defaults to None (`requests.get`).
+        '''
+        self.session = session
+
+    def get(self, url, timeout=None):
+        try:
+            return (self.session or requests).get(url, timeout=timeout)
+        except requests.exceptions.Timeout as error:
+            raise TimeoutError(f'Timed out fetching {url}') from error
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+    def __repr__(self):
+        return f'RequestsTransport({self.session})'
+
+
+class HTTP2Transport(Transport):
+    '''Fetches pages over HTTP/2 with `httpx`, so that concurrent page fetches are
+    multiplexed over a single connection.
+
+    httpx is an optional dependency, install it with `pip install "httpx[http2]"`.
+    '''
+
+    def __init__(self, **client_args):
+        '''Initialise a HTTP2Transport
+
+        Args:
+            client_args: passed on to `httpx.Client`
+
+        Raises:
+            ImportError: if httpx is not installed
+        '''
+        try:
+            import httpx
+        except ImportError as error:
+            raise ImportError(
+                'HTTP2Transport requires httpx: pip install "httpx[http2]"') from error
+
+        self.httpx = httpx
+        self.client = httpx.Client(http2=True, **client_args)
+
+    def get(self, url, timeout=None):
+        if timeout is None:
+            timeout = self.httpx.USE_CLIENT_DEFAULT
+        elif type(timeout) is tuple:
+            connect, read = timeout
+            timeout = self.httpx.Timeout(read, connect=connect)
+
+        try:
+            return self.client.get(url, timeout=timeout)
+        except self.httpx.TimeoutException as error:
+            raise TimeoutError(f'Timed out fetching {url}') from error
+
+    def close(self):
+        self.client.close()
+
+    def __repr__(self):
+        return f'HTTP2Transport({self.client})'
+
+
+class MemoryResponse:
+    '''A canned response served by a MemoryTransport'''
+
+    def __init__(self, status_code, body):
+        '''Initialise a MemoryResponse
+
+        Args:
+            status_code (int): HTTP status code
+            body (dict, list or string): the JSON body of the response, or its text
+        '''
+        self.status_code = status_code
+        self.text = body if type(body) is str else json.dumps(body)
+        self.content = self.text.encode('utf-8')
+        self.elapsed = timedelta(0)
+
+    def json(self):
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return f'MemoryResponse({self.status_code})'
+
+
+class MemoryTransport(Transport):
+    '''Serves canned pages from memory, for tests and benchmarks that should not
+    touch the network.
+
+    Urls are matched on their path and query parameters, ignoring the order of the
+    parameters.  Requests for urls that have not been added get a 404 response.
+    '''
+
+    def __init__(self, pages=None, latency=0):
+        '''Initialise a MemoryTransport
+
+        Args:
+            pages (dict, optional): initial pages as a mapping from url to JSON body
+            latency (float, optional): seconds to wait before serving each page. Defaults to 0.
+        '''
+        self.latency = latency
+        self.pages = {}
+        self.results = {}
+        self.requests = []
+        for url, body in (pages or {}).items():
+            self.add(url, body)
+
+    def add(self, url, body, status_code=200):
+        '''Add a canned page. Pages added this way are served in preference to
+        the pages of a result added with `add_results`.
+
+        Args:
+            url (string): the url the page is served at
+            body (dict, list or string): the JSON body of the page
+            status_code (int, optional): HTTP status code. Defaults to 200.
+
+        Returns:
+            MemoryTransport: self
+        '''
+        self.pages[canonical_url(url)] = MemoryResponse(status_code, body)
+        return self
+
+    def add_results(self, client, path, rows, page_size, max_page_size=None, **params):
+        '''Add a paginated result, whose pages are linked together by links.next
+
+        Pages are built when they are requested, at the urls the client would sign
+        for them, so any page size and number can be asked for.  A query without
+        page[size] gets pages of `page_size` rows.
+
+        Args:
+            client (Client): used to sign the urls of the pages
+            path (string): the api path being served
+            rows (list): all the rows of the result
+            page_size (int): the number of rows on each page when the query does not ask for a size
+            max_page_size (int, optional): the largest page served, larger sizes are reduced to it
+                                           as the api does. Defaults to None (no limit).
+            params: any filters used in the query
+
+        Returns:
+            MemoryTransport: self
+        '''
+        self.results[result_key(client.urlfor(path, **params))] = (client, path, rows, page_size, max_page_size, params)
+        return self
+
+    def get(self, url, timeout=None):
+        self.requests.append(url)
+        if self.latency:
+            limit = timeout[1] if type(timeout) is tuple else timeout
+            if limit is not None and limit < self.latency:
+                time.sleep(limit)
+                raise TimeoutError(f'Timed out fetching {url}')
+            time.sleep(self.latency)
+
+        key = canonical_url(url)
+        if key in self.pages:
+            return self.pages[key]
+        if result_key(url) in self.results:
+            page = self.__result_page(dict(key[2]), *self.results[result_key(url)])
+            if page is not None:
+                return page
+        return MemoryResponse(404, {'errors': [{'status': '404', 'detail': f'No page for {url}'}]})
+
+    def __result_page(self, query, client, path, rows, page_size, max_page_size, params):
+        size = int(query.get('page[size]', page_size))
+        if max_page_size is not None:
+            size = min(size, max_page_size)
+        number = int(query.get('page[number]', 1))
+        total_pages = max(1, -(-len(rows) // size))
+        if size < 1 or not 1 <= number <= total_pages:
+            return None
+
+        body = {
+            'meta': {
+                'query': {'page': {'number': number, 'size': size}},
+                'response': {'status': 'ok',
+                             'total-results': len(rows),
+                             'total-pages': total_pages}
+            },
+            'links': {},
+            'data': rows[(number - 1) * size:number * size],
+            'included': []
+        }
+        if number < total_pages:
+            body['links']['next'] = client.urlfor(path, page_size=size, page_number=number + 1, **params)
+        return MemoryResponse(200, body)
+
+    def __repr__(self):
+        return f'MemoryTransport({len(self.pages)} pages, {len(self.results)} results)'
+
+
+def canonical_url(url):
+    '''Normalise a url so that urls differing only in the order or encoding of
+    their query parameters compare equal
+
+    Args:
+        url (string): a url
+
+    Returns:
+        tuple: (netloc, path, sorted query parameters)
+    '''
+    parsed_url = urlparse(url)
+    query = sorted(parse_qsl(parsed_url.query, keep_blank_values=True))
+    return (parsed_url.netloc, parsed_url.path, tuple(query))
+
+
+def result_key(url):
+    '''Normalise a url ignoring its page size and number, so that every page of a
+    result has the same key
+
+    Args:
+        url (string): a url
+
+    Returns:
+        tuple: (netloc, path, sorted query parameters other than page[size] and page[number])
+    '''
+    netloc, path, query = canonical_url(url)
+    return (netloc, path, tuple(item for item in query if item[0] not in ('page[size]', 'page[number]')))